@@ -0,0 +1,31 @@
+﻿/**
+ * LocalPDF Studio - Offline PDF Toolkit
+ * ======================================
+ * 
+ * @author      Md. Alinur Hossain <alinur1160@gmail.com>
+ * @version     0.0.2
+ * @license     MPL-2.0 (Mozilla Public License 2.0)
+ * @website     https://alinur1.github.io/LocalPDF_Studio_Website/
+ * @repository  https://github.com/Alinur1/LocalPDF_Studio
+ * 
+ * Copyright (c) 2025 Md. Alinur Hossain. All rights reserved.
+ * 
+ * This Source Code Form is subject to the terms of the Mozilla Public
+ * License, v. 2.0. If a copy of the MPL was not distributed with this
+ * file, You can obtain one at https://mozilla.org/MPL/2.0/.
+ * 
+ * Architecture:
+ * - Frontend: Electron + HTML/CSS/JS
+ * - Backend: ASP.NET Core Web API, Python
+ * - PDF Engine: PdfSharp + Mozilla PDF.js
+**/
+
+
+namespace LocalPDF_Studio_api.BLL.Interfaces
+{
+    public interface IPythonWorkerPoolInterface
+    {
+        // Runs a job on a pooled "--worker" process and returns the raw JSON result
+        Task<string> RunJobAsync(string executablePath, object parameters);
+    }
+}
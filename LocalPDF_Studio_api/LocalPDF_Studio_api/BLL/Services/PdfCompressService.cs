@@ -21,7 +21,6 @@
 **/
 
 
-using System.Diagnostics;
 using System.Runtime.InteropServices;
 using System.Text.Json;
 using System.Text.Json.Serialization;
@@ -34,9 +33,12 @@ namespace LocalPDF_Studio_api.BLL.Services
     public class PdfCompressService : IPdfCompressInterface
     {
         private readonly string _pythonExecutablePath;
+        private readonly IPythonWorkerPoolInterface _workerPool;
 
-        public PdfCompressService()
+        public PdfCompressService(IPythonWorkerPoolInterface workerPool)
         {
+            _workerPool = workerPool;
+
             // Determine the path to the Python executable based on the OS
             _pythonExecutablePath = GetPythonExecutablePath();
         }
@@ -146,81 +148,29 @@ namespace LocalPDF_Studio_api.BLL.Services
                 throw new FileNotFoundException(error);
             }
 
-            // Build command-line arguments
+            // Build worker job parameters
             var qualityValue = options.GetQualityValue();
-            var arguments = new List<string>
-            {
-                $"\"{inputPath}\"",
-                $"\"{outputPath}\"",
-                $"--quality {qualityValue}",
-                "--json"
-            };
-
-            if (options.RemoveMetadata)
+            var parameters = new
             {
-                arguments.Add("--remove-metadata");
-            }
-
-            if (options.RemoveUnusedObjects)
-            {
-                arguments.Add("--remove-unused");
-            }
-
-            var argumentString = string.Join(" ", arguments);
-            Console.WriteLine($"Arguments: {argumentString}");
-
-            // Create process start info
-            var startInfo = new ProcessStartInfo
-            {
-                FileName = _pythonExecutablePath,
-                Arguments = argumentString,
-                UseShellExecute = false,
-                RedirectStandardOutput = true,
-                RedirectStandardError = true,
-                CreateNoWindow = true,
-                WorkingDirectory = Path.GetDirectoryName(_pythonExecutablePath)
+                input = inputPath,
+                output = outputPath,
+                options = new
+                {
+                    quality = qualityValue,
+                    remove_metadata = options.RemoveMetadata,
+                    remove_unused_objects = options.RemoveUnusedObjects,
+                    image_workers = options.ImageWorkers,
+                    memory_limit_mb = options.MemoryLimitMb,
+                    target_size_mb = options.TargetSizeMb,
+                    target_dpi = options.TargetDpi,
+                    min_image_saving_percent = options.MinImageSavingPercent,
+                    flate_level = options.FlateLevel
+                }
             };
 
             try
             {
-                using var process = new Process { StartInfo = startInfo };
-
-                // Capture output
-                var outputBuilder = new System.Text.StringBuilder();
-                var errorBuilder = new System.Text.StringBuilder();
-
-                process.OutputDataReceived += (sender, e) =>
-                {
-                    if (!string.IsNullOrEmpty(e.Data))
-                    {
-                        outputBuilder.AppendLine(e.Data);
-                    }
-                };
-
-                process.ErrorDataReceived += (sender, e) =>
-                {
-                    if (!string.IsNullOrEmpty(e.Data))
-                    {
-                        errorBuilder.AppendLine(e.Data);
-                    }
-                };
-
-                process.Start();
-                process.BeginOutputReadLine();
-                process.BeginErrorReadLine();
-
-                // Wait for the process to complete with timeout (2 minutes)
-                await process.WaitForExitAsync();
-
-                // Give a bit of time for output buffers to flush
-                await Task.Delay(100);
-
-                var output = outputBuilder.ToString();
-                var errorOutput = errorBuilder.ToString();
-
-                Console.WriteLine($"Python stdout: {output}");
-                Console.WriteLine($"Python stderr: {errorOutput}");
-                Console.WriteLine($"Exit code: {process.ExitCode}");
+                var output = await _workerPool.RunJobAsync(_pythonExecutablePath, parameters);
 
                 // Parse JSON output
                 try
@@ -251,9 +201,7 @@ namespace LocalPDF_Studio_api.BLL.Services
                 return new PythonCompressionResult
                 {
                     Success = false,
-                    Error = !string.IsNullOrEmpty(errorOutput)
-                        ? errorOutput
-                        : "Unknown error during compression"
+                    Error = "Unknown error during compression"
                 };
             }
             catch (Exception ex)
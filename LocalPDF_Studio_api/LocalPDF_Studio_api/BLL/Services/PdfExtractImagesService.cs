@@ -21,7 +21,6 @@
 **/
 
 
-using System.Diagnostics;
 using System.Runtime.InteropServices;
 using System.Text.Json;
 using LocalPDF_Studio_api.BLL.Interfaces;
@@ -33,15 +32,19 @@ namespace LocalPDF_Studio_api.BLL.Services
     {
         private readonly ILogger<PdfExtractImagesService> _logger;
         private readonly string _pythonExecutablePath;
+        private readonly IPythonWorkerPoolInterface _workerPool;
 
-        public PdfExtractImagesService(ILogger<PdfExtractImagesService> logger)
+        public PdfExtractImagesService(ILogger<PdfExtractImagesService> logger, IPythonWorkerPoolInterface workerPool)
         {
             _logger = logger;
+            _workerPool = workerPool;
             _pythonExecutablePath = GetPythonExecutablePath();
         }
 
         public async Task<byte[]> ProcessImagesAsync(PdfExtractImagesRequest request)
         {
+            string? tempOutputPath = null;
+
             try
             {
                 if (!File.Exists(request.FilePath))
@@ -52,7 +55,11 @@ namespace LocalPDF_Studio_api.BLL.Services
 
                 _logger.LogInformation($"Starting Python-based image processing: {request.FilePath}, Mode: {request.Options.Mode}");
 
-                var pythonResult = await RunPythonImageProcessingAsync(request);
+                // Python writes the ZIP/PDF straight to disk; the JSON result only carries metadata
+                var extension = request.Options.Mode == "extract" ? "zip" : "pdf";
+                tempOutputPath = Path.Combine(Path.GetTempPath(), $"{Guid.NewGuid()}_extract_images.{extension}");
+
+                var pythonResult = await RunPythonImageProcessingAsync(request, tempOutputPath);
 
                 if (!pythonResult.Success)
                 {
@@ -63,7 +70,7 @@ namespace LocalPDF_Studio_api.BLL.Services
 
                 if (request.Options.Mode == "extract")
                 {
-                    if (pythonResult.Images == null || pythonResult.Images.Count == 0)
+                    if (pythonResult.ExtractedCount == 0)
                     {
                         _logger.LogWarning("No images found to extract");
                         // Return empty zip instead of error
@@ -71,39 +78,37 @@ namespace LocalPDF_Studio_api.BLL.Services
                     }
 
                     _logger.LogInformation($"Successfully extracted {pythonResult.ExtractedCount} images from {pythonResult.ProcessedPages} pages");
-                    return CreateZipFromImages(pythonResult.Images);
                 }
                 else // remove mode
                 {
-                    _logger.LogInformation($"DEBUG: PdfData length: {pythonResult.PdfData?.Length ?? 0}");
-                    _logger.LogInformation($"DEBUG: First 100 chars of PdfData: {pythonResult.PdfData?.Substring(0, Math.Min(100, pythonResult.PdfData.Length))}");
-
-                    if (string.IsNullOrEmpty(pythonResult.PdfData))
+                    if (!File.Exists(tempOutputPath))
                     {
-                        _logger.LogError("No PDF data returned from image removal");
+                        _logger.LogError("No PDF returned from image removal");
                         throw new Exception("No PDF data returned from image removal");
                     }
 
-                    try
-                    {
-                        var pdfBytes = Convert.FromBase64String(pythonResult.PdfData);
-                        _logger.LogInformation($"DEBUG: Converted to {pdfBytes.Length} bytes");
-                        _logger.LogInformation($"Successfully removed images from {pythonResult.ProcessedPages} pages. PDF size: {pdfBytes.Length} bytes");
-                        return pdfBytes;
-                    }
-                    catch (FormatException ex)
-                    {
-                        _logger.LogError($"Invalid base64 PDF data: {ex.Message}");
-                        _logger.LogInformation($"DEBUG: PdfData sample: {pythonResult.PdfData?.Substring(0, Math.Min(200, pythonResult.PdfData.Length))}");
-                        throw new Exception("Invalid PDF data returned from image removal");
-                    }
+                    _logger.LogInformation($"Successfully removed images from {pythonResult.ProcessedPages} pages");
                 }
+
+                return await File.ReadAllBytesAsync(tempOutputPath);
             }
             catch (Exception ex)
             {
                 _logger.LogError(ex, "Error processing images in PDF");
                 throw new Exception($"Error processing images: {ex.Message}", ex);
             }
+            finally
+            {
+                try
+                {
+                    if (tempOutputPath != null && File.Exists(tempOutputPath))
+                        File.Delete(tempOutputPath);
+                }
+                catch (Exception ex)
+                {
+                    _logger.LogWarning(ex, "Failed to clean up temp output");
+                }
+            }
         }
 
         private byte[] CreateEmptyZip()
@@ -123,7 +128,7 @@ namespace LocalPDF_Studio_api.BLL.Services
             return memoryStream.ToArray();
         }
 
-        private async Task<PythonImageResult> RunPythonImageProcessingAsync(PdfExtractImagesRequest request)
+        private async Task<PythonImageResult> RunPythonImageProcessingAsync(PdfExtractImagesRequest request, string outputPath)
         {
             if (!File.Exists(_pythonExecutablePath))
                 throw new FileNotFoundException($"Python image tool not found: {_pythonExecutablePath}");
@@ -133,112 +138,33 @@ namespace LocalPDF_Studio_api.BLL.Services
                 file_path = request.FilePath,
                 pages = request.Options.Pages,
                 page_ranges = request.Options.PageRanges,
-                mode = request.Options.Mode
+                mode = request.Options.Mode,
+                output_path = outputPath,
+                // Keep embedded JPEG/JPX/JBIG2 streams as-is unless a uniform PNG set is requested
+                image_format = request.Options.PreserveFormat == false ? "png" : "original"
             };
 
-            var jsonRequest = JsonSerializer.Serialize(pythonRequest);
-
-            // Write JSON to a temporary file to avoid command line escaping issues
-            var tempJsonFile = Path.GetTempFileName();
-            await File.WriteAllTextAsync(tempJsonFile, jsonRequest);
+            _logger.LogInformation($"Running Python image job: {_pythonExecutablePath}");
+            var stdout = await _workerPool.RunJobAsync(_pythonExecutablePath, pythonRequest);
 
             try
             {
-                var startInfo = new ProcessStartInfo
+                //_logger.LogInformation($"Raw Python output: {stdout}");
+                var result = JsonSerializer.Deserialize<PythonImageResult>(stdout, new JsonSerializerOptions
                 {
-                    FileName = _pythonExecutablePath,
-                    Arguments = $"\"{tempJsonFile}\"", // Pass the temp file path instead of raw JSON
-                    UseShellExecute = false,
-                    RedirectStandardOutput = true,
-                    RedirectStandardError = true,
-                    CreateNoWindow = true,
-                    WorkingDirectory = Path.GetDirectoryName(_pythonExecutablePath)
-                };
+                    PropertyNameCaseInsensitive = true
+                });
 
-                using var process = new Process { StartInfo = startInfo };
-                var outputBuilder = new System.Text.StringBuilder();
-                var errorBuilder = new System.Text.StringBuilder();
-
-                process.OutputDataReceived += (_, e) =>
-                {
-                    if (!string.IsNullOrEmpty(e.Data))
-                        outputBuilder.AppendLine(e.Data);
-                };
-                process.ErrorDataReceived += (_, e) =>
-                {
-                    if (!string.IsNullOrEmpty(e.Data))
-                        errorBuilder.AppendLine(e.Data);
-                };
-
-                _logger.LogInformation($"Starting Python process: {startInfo.FileName} {startInfo.Arguments}");
-                process.Start();
-                process.BeginOutputReadLine();
-                process.BeginErrorReadLine();
-                await process.WaitForExitAsync();
-
-                var stdout = outputBuilder.ToString().Trim();
-                var stderr = errorBuilder.ToString().Trim();
-
-                _logger.LogDebug($"Python stdout: {stdout}");
-                if (!string.IsNullOrEmpty(stderr))
-                    _logger.LogWarning($"Python stderr: {stderr}");
-
-                if (string.IsNullOrEmpty(stdout))
-                {
-                    throw new Exception("Python process returned no output");
-                }
+                if (result == null)
+                    throw new Exception("Failed to parse JSON output from Python");
 
-                try
-                {
-                    //_logger.LogInformation($"Raw Python output: {stdout}");
-                    var result = JsonSerializer.Deserialize<PythonImageResult>(stdout, new JsonSerializerOptions
-                    {
-                        PropertyNameCaseInsensitive = true
-                    });
-
-                    if (result == null)
-                        throw new Exception("Failed to parse JSON output from Python");
-
-                    return result;
-                }
-                catch (JsonException ex)
-                {
-                    _logger.LogError($"JSON parse error. Raw output: {stdout}");
-                    throw new Exception($"JSON parse error: {ex.Message}. Raw output: {stdout}");
-                }
-            }
-            finally
-            {
-                // Clean up temp file
-                try
-                {
-                    if (File.Exists(tempJsonFile))
-                        File.Delete(tempJsonFile);
-                }
-                catch (Exception ex)
-                {
-                    _logger.LogWarning(ex, "Failed to delete temp JSON file");
-                }
+                return result;
             }
-        }
-
-        private byte[] CreateZipFromImages(List<PythonImage> images)
-        {
-            using var memoryStream = new System.IO.MemoryStream();
-            using (var archive = new System.IO.Compression.ZipArchive(memoryStream, System.IO.Compression.ZipArchiveMode.Create, true))
+            catch (JsonException ex)
             {
-                foreach (var image in images)
-                {
-                    var imageData = Convert.FromBase64String(image.Data);
-                    var extension = image.Format.ToLower() == "jpg" ? "jpg" : "png";
-                    var fileName = $"page_{image.Page}_image_{image.Index:D4}.{extension}";
-
-                    var entry = archive.CreateEntry(fileName, System.IO.Compression.CompressionLevel.NoCompression);
-                    using var entryStream = entry.Open();
-                    entryStream.Write(imageData, 0, imageData.Length);
-                }
+                _logger.LogError($"JSON parse error. Raw output: {stdout}");
+                throw new Exception($"JSON parse error: {ex.Message}. Raw output: {stdout}");
             }
-            return memoryStream.ToArray();
         }
 
         private string GetPythonExecutablePath()
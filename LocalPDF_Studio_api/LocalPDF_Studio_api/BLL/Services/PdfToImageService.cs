@@ -21,7 +21,6 @@
 **/
 
 
-using System.Diagnostics;
 using System.Runtime.InteropServices;
 using System.Text.Json;
 using LocalPDF_Studio_api.BLL.Interfaces;
@@ -33,10 +32,12 @@ namespace LocalPDF_Studio_api.BLL.Services
     {
         private readonly ILogger<PdfToImageService> _logger;
         private readonly string _pythonExecutablePath;
+        private readonly IPythonWorkerPoolInterface _workerPool;
 
-        public PdfToImageService(ILogger<PdfToImageService> logger)
+        public PdfToImageService(ILogger<PdfToImageService> logger, IPythonWorkerPoolInterface workerPool)
         {
             _logger = logger;
+            _workerPool = workerPool;
             _pythonExecutablePath = GetPythonExecutablePath();
         }
 
@@ -85,53 +86,17 @@ namespace LocalPDF_Studio_api.BLL.Services
             if (!File.Exists(_pythonExecutablePath))
                 throw new FileNotFoundException($"Python converter not found: {_pythonExecutablePath}");
 
-            var arguments = new List<string>
+            var parameters = new
             {
-                $"\"{request.FilePath}\"",
-                $"\"{outputZipPath}\"",
-                $"--dpi {request.Dpi}",
-                $"--format {request.Format.ToLower()}",
-                "--json"
+                input_path = request.FilePath,
+                output_path = outputZipPath,
+                dpi = request.Dpi,
+                format = request.Format.ToLower(),
+                include_page_numbers = request.IncludePageNumbers
             };
 
-            if (request.IncludePageNumbers)
-                arguments.Add("--include-page-numbers");
-
-            var startInfo = new ProcessStartInfo
-            {
-                FileName = _pythonExecutablePath,
-                Arguments = string.Join(" ", arguments),
-                UseShellExecute = false,
-                RedirectStandardOutput = true,
-                RedirectStandardError = true,
-                CreateNoWindow = true
-            };
-
-            using var process = new Process { StartInfo = startInfo };
-            var outputBuilder = new System.Text.StringBuilder();
-            var errorBuilder = new System.Text.StringBuilder();
-
-            process.OutputDataReceived += (_, e) =>
-            {
-                if (!string.IsNullOrEmpty(e.Data))
-                    outputBuilder.AppendLine(e.Data);
-            };
-            process.ErrorDataReceived += (_, e) =>
-            {
-                if (!string.IsNullOrEmpty(e.Data))
-                    errorBuilder.AppendLine(e.Data);
-            };
-
-            process.Start();
-            process.BeginOutputReadLine();
-            process.BeginErrorReadLine();
-            await process.WaitForExitAsync();
-
-            var stdout = outputBuilder.ToString();
-            var stderr = errorBuilder.ToString();
-
-            _logger.LogDebug($"Python stdout: {stdout}");
-            _logger.LogDebug($"Python stderr: {stderr}");
+            var stdout = await _workerPool.RunJobAsync(_pythonExecutablePath, parameters);
+            _logger.LogDebug($"Python result: {stdout}");
 
             try
             {
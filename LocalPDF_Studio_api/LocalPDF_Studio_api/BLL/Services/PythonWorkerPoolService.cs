@@ -0,0 +1,279 @@
+﻿/**
+ * LocalPDF Studio - Offline PDF Toolkit
+ * ======================================
+ * 
+ * @author      Md. Alinur Hossain <alinur1160@gmail.com>
+ * @version     0.0.2
+ * @license     MPL-2.0 (Mozilla Public License 2.0)
+ * @website     https://alinur1.github.io/LocalPDF_Studio_Website/
+ * @repository  https://github.com/Alinur1/LocalPDF_Studio
+ * 
+ * Copyright (c) 2025 Md. Alinur Hossain. All rights reserved.
+ * 
+ * This Source Code Form is subject to the terms of the Mozilla Public
+ * License, v. 2.0. If a copy of the MPL was not distributed with this
+ * file, You can obtain one at https://mozilla.org/MPL/2.0/.
+ * 
+ * Architecture:
+ * - Frontend: Electron + HTML/CSS/JS
+ * - Backend: ASP.NET Core Web API, Python
+ * - PDF Engine: PdfSharp + Mozilla PDF.js
+**/
+
+
+using System.Collections.Concurrent;
+using System.Diagnostics;
+using System.Text;
+using System.Text.Json;
+using Microsoft.Extensions.Options;
+using LocalPDF_Studio_api.BLL.Interfaces;
+using LocalPDF_Studio_api.DAL.Models.PythonWorkerModel;
+
+namespace LocalPDF_Studio_api.BLL.Services
+{
+    public class PythonWorkerPoolService : IPythonWorkerPoolInterface, IDisposable
+    {
+        private readonly ILogger<PythonWorkerPoolService> _logger;
+        private readonly PythonWorkerPoolOptions _options;
+        private readonly ConcurrentDictionary<string, WorkerGroup> _groups = new();
+        private volatile bool _disposed;
+
+        public PythonWorkerPoolService(ILogger<PythonWorkerPoolService> logger, IOptions<PythonWorkerPoolOptions> options)
+        {
+            _logger = logger;
+            _options = options.Value;
+        }
+
+        public async Task<string> RunJobAsync(string executablePath, object parameters)
+        {
+            if (_disposed)
+                throw new ObjectDisposedException(nameof(PythonWorkerPoolService));
+
+            if (!File.Exists(executablePath))
+                throw new FileNotFoundException($"Python executable not found: {executablePath}");
+
+            var group = _groups.GetOrAdd(executablePath, _ => new WorkerGroup(Math.Max(1, _options.WorkersPerTool)));
+
+            await group.Slots.WaitAsync();
+            PythonWorker? worker = null;
+
+            try
+            {
+                worker = await AcquireWorkerAsync(group, executablePath);
+
+                JsonElement response;
+                try
+                {
+                    response = await worker.SendAsync("run", parameters, TimeSpan.FromMinutes(_options.JobTimeoutMinutes));
+                }
+                catch
+                {
+                    // The worker died or timed out mid-job, never hand it out again
+                    worker.Dispose();
+                    worker = null;
+                    throw;
+                }
+
+                worker.JobsCompleted++;
+
+                if (!response.GetProperty("success").GetBoolean())
+                {
+                    var error = response.TryGetProperty("error", out var errorElement) ? errorElement.GetString() : null;
+                    throw new Exception(error ?? "Unknown Python worker error");
+                }
+
+                return response.GetProperty("result").GetRawText();
+            }
+            finally
+            {
+                if (worker != null)
+                    ReleaseWorker(group, worker);
+
+                group.Slots.Release();
+            }
+        }
+
+        private async Task<PythonWorker> AcquireWorkerAsync(WorkerGroup group, string executablePath)
+        {
+            while (group.Idle.TryPop(out var worker))
+            {
+                if (await IsHealthyAsync(worker))
+                    return worker;
+
+                _logger.LogWarning($"Discarding unhealthy Python worker (PID {worker.ProcessId}) for {Path.GetFileName(executablePath)}");
+                worker.Dispose();
+            }
+
+            return StartWorker(executablePath);
+        }
+
+        private async Task<bool> IsHealthyAsync(PythonWorker worker)
+        {
+            if (worker.HasExited)
+                return false;
+
+            if (DateTime.UtcNow - worker.LastUsedUtc < TimeSpan.FromSeconds(_options.HealthCheckIntervalSeconds))
+                return true;
+
+            try
+            {
+                var pong = await worker.SendAsync("ping", null, TimeSpan.FromSeconds(_options.HealthCheckTimeoutSeconds));
+                return pong.GetProperty("success").GetBoolean();
+            }
+            catch (Exception ex)
+            {
+                _logger.LogWarning(ex, $"Health check failed for Python worker (PID {worker.ProcessId})");
+                return false;
+            }
+        }
+
+        private void ReleaseWorker(WorkerGroup group, PythonWorker worker)
+        {
+            if (_disposed || worker.HasExited)
+            {
+                worker.Dispose();
+                return;
+            }
+
+            if (_options.MaxJobsPerWorker > 0 && worker.JobsCompleted >= _options.MaxJobsPerWorker)
+            {
+                _logger.LogInformation($"Recycling Python worker (PID {worker.ProcessId}) after {worker.JobsCompleted} jobs");
+                worker.Dispose();
+                return;
+            }
+
+            worker.LastUsedUtc = DateTime.UtcNow;
+            group.Idle.Push(worker);
+        }
+
+        private PythonWorker StartWorker(string executablePath)
+        {
+            var startInfo = new ProcessStartInfo
+            {
+                FileName = executablePath,
+                Arguments = "--worker",
+                UseShellExecute = false,
+                RedirectStandardInput = true,
+                RedirectStandardOutput = true,
+                RedirectStandardError = true,
+                StandardInputEncoding = new UTF8Encoding(false),
+                StandardOutputEncoding = Encoding.UTF8,
+                CreateNoWindow = true,
+                WorkingDirectory = Path.GetDirectoryName(executablePath)
+            };
+
+            var process = new Process { StartInfo = startInfo };
+            var toolName = Path.GetFileName(executablePath);
+
+            process.ErrorDataReceived += (_, e) =>
+            {
+                if (!string.IsNullOrEmpty(e.Data))
+                    _logger.LogDebug($"[{toolName}] {e.Data}");
+            };
+
+            process.Start();
+            process.BeginErrorReadLine();
+
+            _logger.LogInformation($"Started Python worker {toolName} (PID {process.Id})");
+            return new PythonWorker(process);
+        }
+
+        public void Dispose()
+        {
+            _disposed = true;
+
+            foreach (var group in _groups.Values)
+            {
+                while (group.Idle.TryPop(out var worker))
+                    worker.Dispose();
+            }
+        }
+
+        private sealed class WorkerGroup
+        {
+            public SemaphoreSlim Slots { get; }
+            public ConcurrentStack<PythonWorker> Idle { get; } = new();
+
+            public WorkerGroup(int workerCount)
+            {
+                Slots = new SemaphoreSlim(workerCount, workerCount);
+            }
+        }
+
+        private sealed class PythonWorker : IDisposable
+        {
+            private readonly Process _process;
+
+            public int JobsCompleted { get; set; }
+            public DateTime LastUsedUtc { get; set; } = DateTime.UtcNow;
+            public int ProcessId => _process.Id;
+            public bool HasExited => _process.HasExited;
+
+            public PythonWorker(Process process)
+            {
+                _process = process;
+            }
+
+            public async Task<JsonElement> SendAsync(string command, object? parameters, TimeSpan timeout)
+            {
+                var id = Guid.NewGuid().ToString("N");
+                var request = JsonSerializer.Serialize(new Dictionary<string, object?>
+                {
+                    ["id"] = id,
+                    ["command"] = command,
+                    ["params"] = parameters
+                });
+
+                await _process.StandardInput.WriteLineAsync(request);
+                await _process.StandardInput.FlushAsync();
+
+                using var cts = new CancellationTokenSource(timeout);
+
+                while (true)
+                {
+                    var line = await _process.StandardOutput.ReadLineAsync(cts.Token);
+                    if (line == null)
+                        throw new IOException("Python worker exited unexpectedly");
+
+                    // Skip anything that is not a protocol reply, e.g. library warnings
+                    if (!line.StartsWith("{"))
+                        continue;
+
+                    try
+                    {
+                        using var document = JsonDocument.Parse(line);
+                        var root = document.RootElement;
+                        if (root.TryGetProperty("id", out var replyId) && replyId.GetString() == id)
+                            return root.Clone();
+                    }
+                    catch (JsonException)
+                    {
+                        // Not a protocol line
+                    }
+                }
+            }
+
+            public void Dispose()
+            {
+                try
+                {
+                    if (!_process.HasExited)
+                    {
+                        // Closing stdin lets the worker leave its loop and clean up
+                        _process.StandardInput.Close();
+                        if (!_process.WaitForExit(2000))
+                            _process.Kill(entireProcessTree: true);
+                    }
+                }
+                catch
+                {
+                    // Ignore shutdown errors
+                }
+                finally
+                {
+                    _process.Dispose();
+                }
+            }
+        }
+    }
+}
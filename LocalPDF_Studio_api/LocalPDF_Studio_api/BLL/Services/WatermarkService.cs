@@ -21,7 +21,6 @@
 **/
 
 
-using System.Diagnostics;
 using System.Runtime.InteropServices;
 using System.Text.Json;
 using LocalPDF_Studio_api.BLL.Interfaces;
@@ -33,10 +32,12 @@ namespace LocalPDF_Studio_api.BLL.Services
     {
         private readonly ILogger<WatermarkService> _logger;
         private readonly string _pythonExecutablePath;
+        private readonly IPythonWorkerPoolInterface _workerPool;
 
-        public WatermarkService(ILogger<WatermarkService> logger)
+        public WatermarkService(ILogger<WatermarkService> logger, IPythonWorkerPoolInterface workerPool)
         {
             _logger = logger;
+            _workerPool = workerPool;
             _pythonExecutablePath = GetPythonExecutablePath();
         }
 
@@ -89,85 +90,44 @@ namespace LocalPDF_Studio_api.BLL.Services
             if (!File.Exists(_pythonExecutablePath))
                 throw new FileNotFoundException($"Python watermark tool not found: {_pythonExecutablePath}");
 
-            var arguments = new List<string>
-            {
-                $"\"{request.FilePath}\"",
-                $"\"{outputPath}\"",
-                $"--watermark-type {request.WatermarkType}",
-                $"--text \"{request.Text}\"",
-                $"--position {request.Position}",
-                $"--rotation {request.Rotation}",
-                $"--opacity {request.Opacity}",
-                $"--font-size {request.FontSize}",
-                $"--text-color {request.TextColor}",
-                $"--image-scale {request.ImageScale}",
-                $"--start-page {request.StartPage}",
-                $"--end-page {request.EndPage}",
-                $"--pages-range {request.PagesRange}",
-                "--json"
+            var parameters = new
+            {
+                input_path = request.FilePath,
+                output_path = outputPath,
+                watermark_type = request.WatermarkType,
+                text = request.Text,
+                image_path = request.WatermarkType == "image" ? request.ImagePath : null,
+                position = request.Position,
+                rotation = request.Rotation,
+                opacity = request.Opacity,
+                font_size = request.FontSize,
+                text_color = request.TextColor,
+                text_mode = request.TextMode,
+                font_family = request.FontFamily,
+                image_scale = request.ImageScale,
+                start_page = request.StartPage,
+                end_page = request.EndPage,
+                pages_range = request.PagesRange,
+                custom_pages = request.CustomPages,
+                incremental = request.Incremental
             };
 
-            if (request.WatermarkType == "image" && !string.IsNullOrEmpty(request.ImagePath))
-            {
-                arguments.Add($"--image-path \"{request.ImagePath}\"");
-            }
-
-            if (!string.IsNullOrEmpty(request.CustomPages))
-                arguments.Add($"--custom-pages \"{request.CustomPages}\"");
-
-            var startInfo = new ProcessStartInfo
-            {
-                FileName = _pythonExecutablePath,
-                Arguments = string.Join(" ", arguments),
-                UseShellExecute = false,
-                RedirectStandardOutput = true,
-                RedirectStandardError = true,
-                CreateNoWindow = true
-            };
-
-            using var process = new Process { StartInfo = startInfo };
-            var outputBuilder = new System.Text.StringBuilder();
-            var errorBuilder = new System.Text.StringBuilder();
-
-            process.OutputDataReceived += (_, e) =>
-            {
-                if (!string.IsNullOrEmpty(e.Data))
-                    outputBuilder.AppendLine(e.Data);
-            };
-            process.ErrorDataReceived += (_, e) =>
-            {
-                if (!string.IsNullOrEmpty(e.Data))
-                    errorBuilder.AppendLine(e.Data);
-            };
-
-            process.Start();
-            process.BeginOutputReadLine();
-            process.BeginErrorReadLine();
-            await process.WaitForExitAsync();
-
-            var stdout = outputBuilder.ToString().Trim();
-            var stderr = errorBuilder.ToString().Trim();
-
-            _logger.LogDebug($"Python stdout: {stdout}");
-            if (!string.IsNullOrEmpty(stderr))
-                _logger.LogWarning($"Python stderr: {stderr}");
-
-            if (process.ExitCode != 0)
+            string stdout;
+            try
             {
-                return new PythonWatermarkResult
-                {
-                    Success = false,
-                    Error = $"Python process exited with code {process.ExitCode}. Error: {stderr}"
-                };
+                stdout = await _workerPool.RunJobAsync(_pythonExecutablePath, parameters);
             }
-            if (string.IsNullOrEmpty(stdout))
+            catch (Exception ex)
             {
                 return new PythonWatermarkResult
                 {
                     Success = false,
-                    Error = "Python process returned no output"
+                    Error = $"Python worker failed: {ex.Message}"
                 };
             }
+
+            _logger.LogDebug($"Python result: {stdout}");
+
             try
             {
                 var result = JsonSerializer.Deserialize<PythonWatermarkResult>(stdout, new JsonSerializerOptions
@@ -185,7 +145,7 @@ namespace LocalPDF_Studio_api.BLL.Services
                 return new PythonWatermarkResult
                 {
                     Success = false,
-                    Error = $"JSON parse error: {ex.Message} | Raw stdout: {stdout} | Stderr: {stderr}"
+                    Error = $"JSON parse error: {ex.Message} | Raw stdout: {stdout}"
                 };
             }
         }
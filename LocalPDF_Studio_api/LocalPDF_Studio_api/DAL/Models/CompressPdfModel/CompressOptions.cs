@@ -39,6 +39,24 @@ namespace LocalPDF_Studio_api.DAL.Models.CompressPdfModel
         // Remove unused objects and resources
         public bool RemoveUnusedObjects { get; set; } = true;
 
+        // Threads used to recompress images and streams (0 = one per CPU core)
+        public int ImageWorkers { get; set; } = 0;
+
+        // Memory budget in MB for very large PDFs (0 = no budget)
+        public int MemoryLimitMb { get; set; } = 0;
+
+        // Aim for an output under this size in MB; overrides the quality (0 = off)
+        public double TargetSizeMb { get; set; } = 0;
+
+        // Downsample only images drawn above this resolution (0 = size by quality)
+        public int TargetDpi { get; set; } = 0;
+
+        // Recompress a JPEG image only if its predicted saving is at least this percent
+        public int MinImageSavingPercent { get; set; } = 10;
+
+        // zlib level for lossless recompression of fonts and content streams (0 = off)
+        public int FlateLevel { get; set; } = 9;
+
         // Get the actual quality value to use (1-100)
         public int GetQualityValue()
         {
@@ -42,7 +42,10 @@ namespace LocalPDF_Studio_api.DAL.Models.PdfExtractImages
         [JsonPropertyName("format")]
         public string Format { get; set; }
 
+        [JsonPropertyName("name")]
+        public string? Name { get; set; }
+
         [JsonPropertyName("data")]
-        public string Data { get; set; }
+        public string? Data { get; set; }
     }
 }
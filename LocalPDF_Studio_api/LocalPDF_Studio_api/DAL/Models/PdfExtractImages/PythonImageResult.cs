@@ -45,6 +45,9 @@ namespace LocalPDF_Studio_api.DAL.Models.PdfExtractImages
         [JsonPropertyName("pdf_data")] // This matches the Python JSON key
         public string PdfData { get; set; }
 
+        [JsonPropertyName("output")]
+        public string? Output { get; set; }
+
         [JsonPropertyName("removed_images_count")]
         public int RemovedImagesCount { get; set; }
     }
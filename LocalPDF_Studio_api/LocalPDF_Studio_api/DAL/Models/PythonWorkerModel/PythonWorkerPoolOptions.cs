@@ -0,0 +1,43 @@
+﻿/**
+ * LocalPDF Studio - Offline PDF Toolkit
+ * ======================================
+ * 
+ * @author      Md. Alinur Hossain <alinur1160@gmail.com>
+ * @version     0.0.2
+ * @license     MPL-2.0 (Mozilla Public License 2.0)
+ * @website     https://alinur1.github.io/LocalPDF_Studio_Website/
+ * @repository  https://github.com/Alinur1/LocalPDF_Studio
+ * 
+ * Copyright (c) 2025 Md. Alinur Hossain. All rights reserved.
+ * 
+ * This Source Code Form is subject to the terms of the Mozilla Public
+ * License, v. 2.0. If a copy of the MPL was not distributed with this
+ * file, You can obtain one at https://mozilla.org/MPL/2.0/.
+ * 
+ * Architecture:
+ * - Frontend: Electron + HTML/CSS/JS
+ * - Backend: ASP.NET Core Web API, Python
+ * - PDF Engine: PdfSharp + Mozilla PDF.js
+**/
+
+
+namespace LocalPDF_Studio_api.DAL.Models.PythonWorkerModel
+{
+    public class PythonWorkerPoolOptions
+    {
+        // Maximum number of worker processes kept per Python tool
+        public int WorkersPerTool { get; set; } = 2;
+
+        // Restart a worker after this many jobs to cap memory growth
+        public int MaxJobsPerWorker { get; set; } = 50;
+
+        // Idle workers are pinged before reuse when unused for longer than this
+        public int HealthCheckIntervalSeconds { get; set; } = 30;
+
+        // How long a ping may take before the worker is considered dead
+        public int HealthCheckTimeoutSeconds { get; set; } = 5;
+
+        // Upper bound for a single job
+        public int JobTimeoutMinutes { get; set; } = 30;
+    }
+}
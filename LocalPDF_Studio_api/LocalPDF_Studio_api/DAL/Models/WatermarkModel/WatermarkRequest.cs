@@ -33,11 +33,14 @@ namespace LocalPDF_Studio_api.DAL.Models.WatermarkModel
         public int Opacity { get; set; } = 60;
         public int FontSize { get; set; } = 36;
         public string TextColor { get; set; } = "#3498db";
+        public string TextMode { get; set; } = "raster"; // "raster" or "vector"
+        public string? FontFamily { get; set; } // e.g. "Arial"; null picks the first installed sans font
         public string PagesRange { get; set; } = "all";
         public string? CustomPages { get; set; } = "";
         public int StartPage { get; set; } = 1;
         public int EndPage { get; set; } = 0;
         public string? ImagePath { get; set; }
         public int ImageScale { get; set; } = 50;
+        public bool Incremental { get; set; } = false; // append the stamp instead of rewriting the PDF
     }
 }
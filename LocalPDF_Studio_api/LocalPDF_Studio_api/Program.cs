@@ -23,6 +23,7 @@
 
 using LocalPDF_Studio_api.BLL.Interfaces;
 using LocalPDF_Studio_api.BLL.Services;
+using LocalPDF_Studio_api.DAL.Models.PythonWorkerModel;
 using System.Net;
 using System.Net.Sockets;
 
@@ -31,6 +32,8 @@ var builder = WebApplication.CreateBuilder(args);
 builder.Services.AddControllers();
 builder.Services.AddEndpointsApiExplorer();
 builder.Services.AddSwaggerGen();
+builder.Services.Configure<PythonWorkerPoolOptions>(builder.Configuration.GetSection("PythonWorkerPool"));
+builder.Services.AddSingleton<IPythonWorkerPoolInterface, PythonWorkerPoolService>();
 builder.Services.AddScoped<IPdfMergeInterface, PdfMergeService>();
 builder.Services.AddScoped<IPdfSplitInterface, PdfSplitService>();
 builder.Services.AddScoped<IPdfRemoveInterface, PdfRemoveService>();
@@ -26,9 +26,23 @@ import fitz  # PyMuPDF
 import os
 import sys
 import json
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 import tempfile
+import shutil
 import io
+import math
+import functools
+import multiprocessing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from tool_worker import run_worker
+from result_cache import ResultCache
+from font_registry import FONT_REGISTRY
+from batch_runner import run_batch
+
+RESULT_CACHE = ResultCache("add_watermark")
+
+TEXT_MODES = ["raster", "vector"]
 
 def add_text_watermark(input_path, output_path, text, position, rotation, opacity, 
                       font_size, text_color, start_page, end_page, pages_range, custom_pages,
@@ -50,6 +64,9 @@ def add_text_watermark(input_path, output_path, text, position, rotation, opacit
             # Parse page range
             target_pages = parse_page_range(total_pages, start_page, end_page, pages_range, custom_pages)
             
+            watermark = prepare_text_watermark(text, font_size, text_color, opacity, rotation)
+            watermark_xref = 0
+            
             for page_num in target_pages:
                 if page_num < 1 or page_num > total_pages:
                     continue
@@ -57,11 +74,11 @@ def add_text_watermark(input_path, output_path, text, position, rotation, opacit
                 page = doc[page_num - 1]
                 
                 if position == "Tiled":
-                    add_tiled_watermark_high_quality(page, text, font_size, text_color, opacity, rotation)
+                    watermark_xref = add_tiled_watermark_high_quality(page, watermark, watermark_xref)
                 else:
-                    add_single_watermark_high_quality(page, text, position, font_size, text_color, opacity, rotation)
+                    watermark_xref = add_single_watermark_high_quality(page, watermark, position, watermark_xref)
 
-            doc.save(output_path)
+            doc.save(output_path, deflate_images=True)
             doc.close()
             
             return {
@@ -74,50 +91,26 @@ def add_text_watermark(input_path, output_path, text, position, rotation, opacit
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-def add_single_watermark_high_quality(page, text, position, font_size, text_color, opacity, rotation):
-    """Add high-quality image watermark"""
-    # Create high-quality image
-    watermark_image = create_high_quality_watermark_image(text, font_size, text_color, opacity, rotation)
-    
-    # Convert to bytes
-    img_bytes = io.BytesIO()
-    watermark_image.save(img_bytes, format='PNG', dpi=(300, 300))
-    img_bytes.seek(0)
-    
-    # Create pixmap
-    pix = fitz.Pixmap(img_bytes.read())
-    
-    # Convert pixel dimensions to points
-    dpi = 300
-    width_in_points = pix.width * 72 / dpi
-    height_in_points = pix.height * 72 / dpi
+def add_single_watermark_high_quality(page, watermark, position, xref=0):
+    """
+    Add high-quality image watermark.
     
+    Pass the xref returned by the previous call so every page shows the
+    same image object instead of storing its own copy. Returns the xref.
+    """
     # Calculate position (using dimensions in points)
-    rect = calculate_simple_position(page.rect, position, width_in_points, height_in_points)
+    rect = calculate_simple_position(page.rect, position, watermark["width"], watermark["height"])
     
-    # Insert image
-    page.insert_image(rect, pixmap=pix)
-    pix = None
+    return place_watermark(page, watermark, rect, xref)
 
-def add_tiled_watermark_high_quality(page, text, font_size, text_color, opacity, rotation):
-    """Add three high-quality watermarks"""
+def add_tiled_watermark_high_quality(page, watermark, xref=0):
+    """Add three high-quality watermarks sharing one image object; returns its xref"""
     page_rect = page.rect
     page_width = page_rect.width
     page_height = page_rect.height
     
-    # Create high-quality image
-    watermark_image = create_high_quality_watermark_image(text, font_size, text_color, opacity, rotation)
-    
-    # Convert to bytes
-    img_bytes = io.BytesIO()
-    watermark_image.save(img_bytes, format='PNG', dpi=(300, 300))
-    img_bytes.seek(0)
-    pix = fitz.Pixmap(img_bytes.read())
-    
-    # Convert pixel dimensions to points
-    dpi = 300
-    watermark_width = pix.width * 72 / dpi
-    watermark_height = pix.height * 72 / dpi
+    watermark_width = watermark["width"]
+    watermark_height = watermark["height"]
     
     # Position three watermarks: center, top-center, bottom-center
     center_x = page_width / 2
@@ -132,56 +125,115 @@ def add_tiled_watermark_high_quality(page, text, font_size, text_color, opacity,
     # Add the three watermarks
     for x, y in positions:
         rect = fitz.Rect(x, y, x + watermark_width, y + watermark_height)
-        page.insert_image(rect, pixmap=pix)
+        xref = place_watermark(page, watermark, rect, xref)
     
-    pix = None  # Free memory
+    return xref
 
-def create_high_quality_watermark_image(text, font_size, text_color, opacity, rotation):
+def place_watermark(page, watermark, rect, xref=0):
+    """Draw a prepared watermark centered in rect; returns the image xref (0 for vector text)"""
+    if not watermark.get("vector"):
+        return page.insert_image(rect, stream=watermark["stream"], xref=xref)
+    
+    # Lay the text out unrotated around the rect center, then rotate it there
+    center = (rect.tl + rect.br) / 2
+    baseline = fitz.Point(center.x - watermark["text_width"] / 2, center.y + watermark["baseline_offset"])
+    page.insert_text(
+        baseline, watermark["text"],
+        fontsize=watermark["font_size"],
+        fontname=watermark["fontname"],
+        fontfile=watermark["fontfile"],
+        color=watermark["color"],
+        fill_opacity=watermark["opacity"],
+        morph=(center, fitz.Matrix(-watermark["rotation"]))
+    )
+    return xref
+
+@functools.lru_cache(maxsize=16)
+def prepare_text_watermark(text, font_size, text_color, opacity, rotation, font_family=None):
+    """
+    Render the text watermark once and keep it for every page (and, in
+    worker mode, for later jobs with the same settings).
+    
+    Returns {"stream": PNG bytes, "width"/"height": size in points}.
+    """
+    watermark_image = create_high_quality_watermark_image(text, font_size, text_color, opacity, rotation, font_family)
+    
+    # Convert to bytes
+    img_bytes = io.BytesIO()
+    watermark_image.save(img_bytes, format='PNG', dpi=(300, 300))
+    
+    # Convert pixel dimensions to points
+    dpi = 300
+    return {
+        "stream": img_bytes.getvalue(),
+        "width": watermark_image.width * 72 / dpi,
+        "height": watermark_image.height * 72 / dpi
+    }
+
+@functools.lru_cache(maxsize=16)
+def prepare_vector_text_watermark(text, font_size, text_color, opacity, rotation, font_family=None):
+    """
+    Describe a text watermark drawn as real PDF text with native fill opacity.
+    
+    Latin-1 text without a requested font_family uses the built-in Helvetica,
+    which adds no font data at all; anything else embeds the matching system
+    font, which MuPDF stores once per document. Width/height are the rotated bounding box in points,
+    matching what the raster watermark occupies.
+    """
+    fontname, fontfile = "helv", None
+    try:
+        text.encode("latin-1")
+        needs_font = bool(font_family)
+    except UnicodeEncodeError:
+        needs_font = True
+    
+    if needs_font:
+        fontfile = FONT_REGISTRY.find(font_family)
+        if fontfile:
+            fontname = "LocalPdfWatermark"
+    
+    font = fitz.Font(fontfile=fontfile) if fontfile else fitz.Font(fontname)
+    text_width = font.text_length(text, fontsize=font_size)
+    text_height = font_size * (font.ascender - font.descender)
+    
+    # Same padding as the raster watermark
+    padding = font_size * 0.8
+    width = text_width + padding * 2
+    height = text_height + padding * 2
+    
+    angle = math.radians(rotation)
+    cos_a, sin_a = abs(math.cos(angle)), abs(math.sin(angle))
+    r, g, b = parse_text_color(text_color)
+    
+    return {
+        "vector": True,
+        "text": text,
+        "font_size": font_size,
+        "fontname": fontname,
+        "fontfile": fontfile,
+        "color": (r / 255, g / 255, b / 255),
+        "opacity": opacity / 100,
+        "rotation": rotation,
+        "text_width": text_width,
+        "baseline_offset": font_size * (font.ascender + font.descender) / 2,
+        "width": width * cos_a + height * sin_a,
+        "height": width * sin_a + height * cos_a
+    }
+
+def parse_text_color(text_color):
+    """'#rrggbb' to an (r, g, b) tuple; anything else falls back to the default blue"""
+    if text_color.startswith('#'):
+        return int(text_color[1:3], 16), int(text_color[3:5], 16), int(text_color[5:7], 16)
+    return 52, 152, 219
+
+def create_high_quality_watermark_image(text, font_size, text_color, opacity, rotation, font_family=None):
     """Create high-quality watermark image with proper DPI"""
     # Use high DPI for crisp rendering
     dpi = 300
     scale_factor = dpi / 72.0  # PDF points to pixels
     
-    # Load font first to calculate text dimensions
-    try:
-        # Cross-platform font paths
-        font_paths = [
-            # Windows
-            "arial.ttf", "Arial.ttf",
-            "C:/Windows/Fonts/arial.ttf",
-            "C:/Windows/Fonts/tahoma.ttf",
-            "C:/Windows/Fonts/verdana.ttf",
-            
-            # Linux
-            "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-            "/usr/share/fonts/truetype/ubuntu/Ubuntu-R.ttf",
-            "/usr/share/fonts/truetype/freefont/FreeSans.ttf",
-            
-            # macOS
-            "/Library/Fonts/Arial.ttf",
-            "/Library/Fonts/Verdana.ttf",
-            "/System/Library/Fonts/Helvetica.ttc",
-            "/System/Library/Fonts/Arial.ttf"
-        ]
-        
-        font = None
-        for font_path in font_paths:
-            try:
-                # Scale font size for high DPI
-                scaled_font_size = int(font_size * scale_factor)
-                font = ImageFont.truetype(font_path, scaled_font_size)
-                #print(f"Using font: {font_path}")  # Debug log
-                break
-            except Exception as e:
-                continue
-        
-        if font is None:
-            #print("No system font found, using default")
-            font = ImageFont.load_default()
-    except Exception as e:
-        #print(f"Font loading warning: {e}")
-        font = ImageFont.load_default()
+    # Load font first to calculate text dimensions (scaled for high DPI)
+    font = FONT_REGISTRY.truetype(int(font_size * scale_factor), font_family)
     
     # Create temporary image to measure text
     temp_image = Image.new("RGBA", (1, 1), (0, 0, 0, 0))
@@ -211,12 +263,7 @@ def create_high_quality_watermark_image(text, font_size, text_color, opacity, ro
     y = (height - text_height) // 2
     
     # Convert color and apply opacity
-    if text_color.startswith('#'):
-        r = int(text_color[1:3], 16)
-        g = int(text_color[3:5], 16)
-        b = int(text_color[5:7], 16)
-    else:
-        r, g, b = 52, 152, 219
+    r, g, b = parse_text_color(text_color)
     
     alpha = int(255 * opacity / 100)
     text_color_with_alpha = (r, g, b, alpha)
@@ -311,7 +358,37 @@ def parse_custom_pages(custom_pages, total_pages):
 def add_watermark(input_path, output_path, watermark_type="text", text="CONFIDENTIAL", 
                  image_path=None, position="Center", rotation=45, opacity=60, 
                  font_size=36, text_color="#3498db", image_scale=50,
-                 start_page=1, end_page=0, pages_range="all", custom_pages=""):
+                 start_page=1, end_page=0, pages_range="all", custom_pages="", text_mode="raster",
+                 font_family=None, incremental=False):
+    """Add a watermark, reusing a cached result for the same input, image and options"""
+    options = {
+        "watermark_type": watermark_type, "text": text, "position": position,
+        "rotation": rotation, "opacity": opacity, "font_size": font_size,
+        "text_color": text_color, "image_scale": image_scale, "start_page": start_page,
+        "end_page": end_page, "pages_range": pages_range, "custom_pages": custom_pages,
+        "text_mode": text_mode, "font_family": font_family, "incremental": incremental
+    }
+    # The watermark image is hashed as a second input, not by its path
+    input_paths = [input_path]
+    if watermark_type == "image" and image_path and os.path.exists(image_path):
+        input_paths.append(image_path)
+    
+    result, cache_stats = RESULT_CACHE.run(
+        input_paths, options, output_path,
+        lambda: add_watermark_uncached(input_path, output_path, image_path=image_path, **options),
+        lambda r: r.get("success")
+    )
+    
+    if cache_stats and cache_stats["hit"]:
+        result["output"] = os.path.normpath(output_path)
+    result["cache"] = cache_stats
+    return result
+
+def add_watermark_uncached(input_path, output_path, watermark_type="text", text="CONFIDENTIAL", 
+                 image_path=None, position="Center", rotation=45, opacity=60, 
+                 font_size=36, text_color="#3498db", image_scale=50,
+                 start_page=1, end_page=0, pages_range="all", custom_pages="", text_mode="raster",
+                 font_family=None, incremental=False):
     try:
         # Normalize paths for cross-platform compatibility
         input_path = os.path.normpath(input_path)
@@ -325,42 +402,72 @@ def add_watermark(input_path, output_path, watermark_type="text", text="CONFIDEN
         if watermark_type == "image" and (not image_path or not os.path.exists(image_path)):
             return {"success": False, "error": f"Image file not found: {image_path}"}
 
-        doc = fitz.open(input_path)
+        if text_mode not in TEXT_MODES:
+            return {"success": False, "error": f"Unsupported text mode: {text_mode}"}
+
+        doc, incremental = open_for_watermark(input_path, output_path, incremental)
         total_pages = doc.page_count
         
         # Parse page range
         target_pages = parse_page_range(total_pages, start_page, end_page, pages_range, custom_pages)
         
+        # The watermark is prepared once and embedded once, then shown on every page
+        if watermark_type == "image":
+            watermark = prepare_image_watermark(image_path, image_scale, opacity, rotation)
+        elif text_mode == "vector":
+            watermark = prepare_vector_text_watermark(text, font_size, text_color, opacity, rotation, font_family)
+        else:
+            watermark = prepare_text_watermark(text, font_size, text_color, opacity, rotation, font_family)
+        watermark_xref = 0
+        
         for page_num in target_pages:
             if page_num < 1 or page_num > total_pages:
                 continue
                 
             page = doc[page_num - 1]
             
-            if watermark_type == "image":
-                if position == "Tiled":
-                    add_tiled_image_watermark(page, image_path, image_scale, opacity, rotation)
-                else:
-                    add_single_image_watermark(page, image_path, position, image_scale, opacity, rotation)
+            if position == "Tiled":
+                watermark_xref = add_tiled_watermark_high_quality(page, watermark, watermark_xref)
             else:
-                if position == "Tiled":
-                    add_tiled_watermark_high_quality(page, text, font_size, text_color, opacity, rotation)
-                else:
-                    add_single_watermark_high_quality(page, text, position, font_size, text_color, opacity, rotation)
+                watermark_xref = add_single_watermark_high_quality(page, watermark, position, watermark_xref)
 
-        doc.save(output_path)
+        # Inserted watermark bitmaps are stored raw; deflate them losslessly
+        if incremental:
+            doc.save(output_path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP, deflate_images=True)
+        else:
+            doc.save(output_path, deflate_images=True)
         doc.close()
         
         return {
             "success": True,
             "page_count": total_pages,
             "watermarked_pages": len(target_pages),
-            "output": output_path
+            "output": output_path,
+            "incremental": incremental
         }
 
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+def open_for_watermark(input_path, output_path, incremental):
+    """
+    Open the document that will receive the watermark; returns (doc, incremental).
+    
+    For incremental output the original bytes are copied to output_path and
+    that copy is opened, so saving only appends the stamped pages and the new
+    objects. PDFs that cannot be updated incrementally (e.g. ones MuPDF had
+    to repair) fall back to a normal full rewrite from input_path.
+    """
+    if incremental:
+        if os.path.abspath(input_path) != os.path.abspath(output_path):
+            shutil.copyfile(input_path, output_path)
+        doc = fitz.open(output_path)
+        if doc.can_save_incrementally():
+            return doc, True
+        doc.close()
+        print("Warning: PDF cannot be saved incrementally; writing a full copy", file=sys.stderr)
+    return fitz.open(input_path), False
+
 def add_image_watermark(input_path, output_path, image_path, position, rotation, opacity, 
                        image_scale, start_page, end_page, pages_range, custom_pages):
     try:
@@ -375,6 +482,9 @@ def add_image_watermark(input_path, output_path, image_path, position, rotation,
         # Parse page range
         target_pages = parse_page_range(total_pages, start_page, end_page, pages_range, custom_pages)
         
+        watermark = prepare_image_watermark(image_path, image_scale, opacity, rotation)
+        watermark_xref = 0
+        
         for page_num in target_pages:
             if page_num < 1 or page_num > total_pages:
                 continue
@@ -382,11 +492,11 @@ def add_image_watermark(input_path, output_path, image_path, position, rotation,
             page = doc[page_num - 1]
             
             if position == "Tiled":
-                add_tiled_image_watermark(page, image_path, image_scale, opacity, rotation)
+                watermark_xref = add_tiled_watermark_high_quality(page, watermark, watermark_xref)
             else:
-                add_single_image_watermark(page, image_path, position, image_scale, opacity, rotation)
+                watermark_xref = add_single_watermark_high_quality(page, watermark, position, watermark_xref)
 
-        doc.save(output_path)
+        doc.save(output_path, deflate_images=True)
         doc.close()
         
         return {
@@ -399,8 +509,13 @@ def add_image_watermark(input_path, output_path, image_path, position, rotation,
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-def add_single_image_watermark(page, image_path, position, image_scale, opacity, rotation):
-    """Add single image watermark"""
+def prepare_image_watermark(image_path, image_scale, opacity, rotation):
+    """
+    Load, fade and rotate the watermark image once per job.
+    
+    Returns the same {"stream", "width", "height"} shape as
+    prepare_text_watermark, so pages only need a placement call.
+    """
     try:
         # Load and process the image
         with Image.open(image_path) as img:
@@ -408,10 +523,10 @@ def add_single_image_watermark(page, image_path, position, image_scale, opacity,
             if img.mode != 'RGBA':
                 img = img.convert('RGBA')
             
-            # Apply opacity
+            # Apply opacity through a lookup table instead of a per-pixel lambda
             if opacity < 100:
-                alpha = img.split()[3] if len(img.split()) > 3 else Image.new('L', img.size, 255)
-                alpha = alpha.point(lambda p: p * opacity // 100)
+                alpha = img.getchannel('A')
+                alpha = alpha.point([p * opacity // 100 for p in range(256)])
                 img.putalpha(alpha)
             
             # Apply rotation
@@ -421,81 +536,44 @@ def add_single_image_watermark(page, image_path, position, image_scale, opacity,
             # Convert to bytes
             img_bytes = io.BytesIO()
             img.save(img_bytes, format='PNG')
-            img_bytes.seek(0)
-            
-            # Create pixmap
-            pix = fitz.Pixmap(img_bytes.read())
             
             # Calculate scale factor (image_scale is percentage)
             scale_factor = image_scale / 100.0
-            watermark_width = pix.width * scale_factor
-            watermark_height = pix.height * scale_factor
-            
-            # Calculate position
-            rect = calculate_simple_position(page.rect, position, watermark_width, watermark_height)
-            
-            # Insert image
-            page.insert_image(rect, pixmap=pix)
-            pix = None
+            return {
+                "stream": img_bytes.getvalue(),
+                "width": img.width * scale_factor,
+                "height": img.height * scale_factor
+            }
     except Exception as e:
         raise Exception(f"Failed to add image watermark: {str(e)}")
 
-def add_tiled_image_watermark(page, image_path, image_scale, opacity, rotation):
-    """Add three tiled image watermarks"""
-    try:
-        page_rect = page.rect
-        page_width = page_rect.width
-        page_height = page_rect.height
-        
-        # Load and process the image
-        with Image.open(image_path) as img:
-            if img.mode != 'RGBA':
-                img = img.convert('RGBA')
-            
-            # Apply opacity
-            if opacity < 100:
-                alpha = img.split()[3] if len(img.split()) > 3 else Image.new('L', img.size, 255)
-                alpha = alpha.point(lambda p: p * opacity // 100)
-                img.putalpha(alpha)
-            
-            # Apply rotation
-            if rotation != 0:
-                img = img.rotate(-rotation, expand=True, resample=Image.BICUBIC, fillcolor=(0, 0, 0, 0))
-            
-            # Convert to bytes
-            img_bytes = io.BytesIO()
-            img.save(img_bytes, format='PNG')
-            img_bytes.seek(0)
-            pix = fitz.Pixmap(img_bytes.read())
-        
-        # Calculate scale factor
-        scale_factor = image_scale / 100.0
-        watermark_width = pix.width * scale_factor
-        watermark_height = pix.height * scale_factor
-        
-        # Position three watermarks
-        center_x = page_width / 2
-        center_y = page_height / 2
-        
-        positions = [
-            (center_x - watermark_width / 2, center_y - watermark_height / 2),  # Center
-            (center_x - watermark_width / 2, center_y / 3 - watermark_height / 2),  # Top-third
-            (center_x - watermark_width / 2, center_y * 5/3 - watermark_height / 2)  # Bottom-third
-        ]
-        
-        # Add the three watermarks
-        for x, y in positions:
-            rect = fitz.Rect(x, y, x + watermark_width, y + watermark_height)
-            page.insert_image(rect, pixmap=pix)
-        
-        pix = None
-    except Exception as e:
-        raise Exception(f"Failed to add tiled image watermark: {str(e)}")
+def run_job(params):
+    """Run one watermark job from a worker request."""
+    return add_watermark(
+        input_path=params.get("input_path"),
+        output_path=params.get("output_path"),
+        watermark_type=params.get("watermark_type", "text"),
+        text=params.get("text", "CONFIDENTIAL"),
+        image_path=params.get("image_path"),
+        position=params.get("position", "Center"),
+        rotation=params.get("rotation", 45),
+        opacity=params.get("opacity", 60),
+        font_size=params.get("font_size", 36),
+        text_color=params.get("text_color", "#3498db"),
+        image_scale=params.get("image_scale", 50),
+        start_page=params.get("start_page", 1),
+        end_page=params.get("end_page", 0),
+        pages_range=params.get("pages_range", "all"),
+        custom_pages=params.get("custom_pages") or "",
+        text_mode=params.get("text_mode") or "raster",
+        font_family=params.get("font_family") or None,
+        incremental=bool(params.get("incremental", False))
+    )
 
 def main():
     parser = argparse.ArgumentParser(description="Add watermark to PDF pages")
-    parser.add_argument("input", help="Path to input PDF file")
-    parser.add_argument("output", help="Path to output PDF file")
+    parser.add_argument("input", nargs="?", help="Path to input PDF file")
+    parser.add_argument("output", nargs="?", help="Path to output PDF file")
     
     # Watermark type
     parser.add_argument("--watermark-type", type=str, default="text", 
@@ -505,6 +583,11 @@ def main():
     parser.add_argument("--text", type=str, default="CONFIDENTIAL", help="Watermark text")
     parser.add_argument("--font-size", type=int, default=36, help="Font size")
     parser.add_argument("--text-color", type=str, default="#3498db", help="Text color in hex")
+    parser.add_argument("--text-mode", type=str, default="raster", choices=TEXT_MODES,
+                       help="raster: 300-DPI image (exact look); vector: real, searchable PDF text")
+    parser.add_argument("--font-family", type=str, help="Font family name, e.g. 'Arial' (default: first installed sans font)")
+    parser.add_argument("--incremental", action="store_true",
+                       help="Append the watermark as an incremental update instead of rewriting the whole PDF")
     
     # Image watermark options
     parser.add_argument("--image-path", type=str, help="Path to image file for image watermark")
@@ -524,10 +607,29 @@ def main():
                        choices=["all", "first", "last", "custom"], help="Pages range type")
     parser.add_argument("--custom-pages", type=str, default="", help="Custom pages (e.g., '1-5,7,9-12')")
     
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the result cache")
     parser.add_argument("--json", action="store_true", help="Return JSON result for .NET backend")
+    parser.add_argument("--worker", action="store_true", help="Run as a long-lived worker reading JSON jobs from stdin")
+    parser.add_argument("--batch", metavar="MANIFEST",
+                       help="Run every job in a JSON manifest, streaming one JSON result line per job")
+    parser.add_argument("--batch-workers", type=int,
+                       help="Processes for --batch (default: from the manifest, else one per CPU core)")
 
     args = parser.parse_args()
 
+    if args.no_cache:
+        RESULT_CACHE.enabled = False
+
+    if args.worker:
+        run_worker(run_job, "add_watermark")
+        return
+
+    if args.batch:
+        sys.exit(0 if run_batch(args.batch, run_job, args.batch_workers) else 1)
+
+    if not args.input or not args.output:
+        parser.error("input and output are required")
+
     result = add_watermark(
         input_path=args.input,
         output_path=args.output,
@@ -543,7 +645,10 @@ def main():
         start_page=args.start_page,
         end_page=args.end_page,
         pages_range=args.pages_range,
-        custom_pages=args.custom_pages
+        custom_pages=args.custom_pages,
+        text_mode=args.text_mode,
+        font_family=args.font_family,
+        incremental=args.incremental
     )
 
     if args.json:
@@ -555,4 +660,6 @@ def main():
             print(f"❌ Error: {result['error']}")
 
 if __name__ == "__main__":
+    # Required for process pools inside the frozen PyInstaller executable
+    multiprocessing.freeze_support()
     main()
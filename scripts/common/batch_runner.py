@@ -0,0 +1,158 @@
+##
+ # LocalPDF Studio - Offline PDF Toolkit
+ # ======================================
+ #
+ # @author      Md. Alinur Hossain <alinur1160@gmail.com>
+ # @version     0.0.2
+ # @license     MPL-2.0 (Mozilla Public License 2.0)
+ # @website     https://alinur1.github.io/LocalPDF_Studio_Website/
+ # @repository  https://github.com/Alinur1/LocalPDF_Studio
+ #
+ # Copyright (c) 2025 Md. Alinur Hossain. All rights reserved.
+ #
+ # This Source Code Form is subject to the terms of the Mozilla Public
+ # License, v. 2.0. If a copy of the MPL was not distributed with this
+ # file, You can obtain one at https://mozilla.org/MPL/2.0/.
+ #
+ # Architecture:
+ # - Frontend: Electron + HTML/CSS/JS
+ # - Backend: ASP.NET Core Web API, Python
+ # - PDF Engine: PdfSharp + Mozilla PDF.js
+##
+
+
+# Batch mode shared by the Python tools: one process launch runs a whole
+# manifest of jobs on a process pool.
+#
+# The manifest is a JSON file holding either a list of jobs or
+#   {"workers": n, "jobs": [...]}
+# where every job takes the same fields as the tool's worker requests (an
+# optional "id" is echoed back). One JSON line is written per job as soon as
+# it finishes, in completion order, then one summary line:
+#   {"index": 0, "id": "...", "success": true, "result": {...}}
+#   {"index": 1, "id": "...", "success": false, "error": "..."}
+#   {"batch": true, "total": 2, "succeeded": 1, "failed": 1, "seconds": 3.2}
+# A failing job never stops the rest of the batch. If a job crashes its pool
+# process, the jobs in flight at that moment are reported as failed and the
+# pool is restarted for the remaining ones.
+
+
+import os
+import sys
+import json
+import time
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+
+def load_manifest(manifest_path):
+    """Return (jobs, workers) from a manifest file"""
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if isinstance(manifest, dict):
+        return manifest.get("jobs") or [], manifest.get("workers", 0)
+    return manifest, 0
+
+
+def job_succeeded(result):
+    """True when a tool result reports success (compress_pdf uses "Success")"""
+    if not isinstance(result, dict):
+        return True
+    return bool(result.get("success", result.get("Success")))
+
+
+def run_batch_job(handler, params):
+    """Run one job in a pool process; tool output goes to stderr, never the result stream"""
+    with contextlib.redirect_stdout(sys.stderr):
+        return handler(params)
+
+
+def run_batch(manifest_path, handler, workers=None):
+    """
+    Run every job in the manifest through handler on a process pool.
+
+    handler must be a module-level function so it can be sent to the pool.
+    workers overrides the manifest's worker count; 0 means one per CPU core.
+    Returns True when every job succeeded.
+    """
+    start = time.perf_counter()
+    jobs, manifest_workers = load_manifest(manifest_path)
+    workers = manifest_workers if workers is None else workers
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(jobs) or 1))
+
+    succeeded = 0
+    failed = 0
+
+    def report(index, job, success, payload):
+        line = {"index": index, "id": job.get("id") if isinstance(job, dict) else None, "success": success}
+        line.update(payload)
+        sys.stdout.write(json.dumps(line) + "\n")
+        sys.stdout.flush()
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    pending = {}
+    next_index = 0
+    pool_broken = False
+
+    try:
+        while next_index < len(jobs) or pending:
+            # A crashed pool fails everything in flight; restart it once those are reported
+            if pool_broken and not pending:
+                executor.shutdown(wait=False)
+                executor = ProcessPoolExecutor(max_workers=workers)
+                pool_broken = False
+
+            # Keep a bounded number of jobs queued so huge manifests stay cheap
+            while not pool_broken and next_index < len(jobs) and len(pending) < workers * 2:
+                job = jobs[next_index]
+                if isinstance(job, dict):
+                    try:
+                        pending[executor.submit(run_batch_job, handler, job)] = next_index
+                    except BrokenProcessPool:
+                        pool_broken = True
+                        break
+                else:
+                    report(next_index, job, False, {"error": "Job must be a JSON object"})
+                    failed += 1
+                next_index += 1
+
+            if not pending:
+                continue
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    report(index, jobs[index], False, {"error": "Worker process crashed while running this job"})
+                    failed += 1
+                    pool_broken = True
+                    continue
+                except Exception as e:
+                    report(index, jobs[index], False, {"error": str(e)})
+                    failed += 1
+                    continue
+
+                success = job_succeeded(result)
+                report(index, jobs[index], success, {"result": result})
+                if success:
+                    succeeded += 1
+                else:
+                    failed += 1
+    finally:
+        executor.shutdown()
+
+    sys.stdout.write(json.dumps({
+        "batch": True,
+        "total": len(jobs),
+        "succeeded": succeeded,
+        "failed": failed,
+        "seconds": round(time.perf_counter() - start, 3)
+    }) + "\n")
+    sys.stdout.flush()
+    return failed == 0
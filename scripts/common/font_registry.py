@@ -0,0 +1,115 @@
+##
+ # LocalPDF Studio - Offline PDF Toolkit
+ # ======================================
+ #
+ # @author      Md. Alinur Hossain <alinur1160@gmail.com>
+ # @version     0.0.2
+ # @license     MPL-2.0 (Mozilla Public License 2.0)
+ # @website     https://alinur1.github.io/LocalPDF_Studio_Website/
+ # @repository  https://github.com/Alinur1/LocalPDF_Studio
+ #
+ # Copyright (c) 2025 Md. Alinur Hossain. All rights reserved.
+ #
+ # This Source Code Form is subject to the terms of the Mozilla Public
+ # License, v. 2.0. If a copy of the MPL was not distributed with this
+ # file, You can obtain one at https://mozilla.org/MPL/2.0/.
+ #
+ # Architecture:
+ # - Frontend: Electron + HTML/CSS/JS
+ # - Backend: ASP.NET Core Web API, Python
+ # - PDF Engine: PdfSharp + Mozilla PDF.js
+##
+
+
+# Font lookup shared by the tools that draw text.
+#
+# The platform font folders are scanned once per process and indexed by file
+# name, so callers can ask for a family ("Arial", "DejaVu Sans") instead of
+# probing hard-coded paths. Loaded PIL fonts are kept in an LRU per
+# (family, size).
+
+
+import os
+import sys
+import functools
+
+from PIL import ImageFont
+
+FONT_EXTENSIONS = (".ttf", ".otf", ".ttc")
+
+# Tried in order when the caller does not ask for a family
+DEFAULT_FAMILIES = [
+    "Arial", "Tahoma", "Verdana",                               # Windows
+    "Liberation Sans", "DejaVu Sans", "Ubuntu", "FreeSans",     # Linux
+    "Helvetica",                                                # macOS
+]
+
+# File name suffixes of the regular face, e.g. LiberationSans-Regular, Ubuntu-R, ArialMT
+REGULAR_SUFFIXES = ["", "regular", "r", "mt", "book", "roman"]
+
+
+def default_font_dirs():
+    home = os.path.expanduser("~")
+    if sys.platform == "win32":
+        windir = os.environ.get("WINDIR", "C:/Windows")
+        local = os.environ.get("LOCALAPPDATA", os.path.join(home, "AppData", "Local"))
+        return [os.path.join(windir, "Fonts"), os.path.join(local, "Microsoft", "Windows", "Fonts")]
+    if sys.platform == "darwin":
+        return ["/System/Library/Fonts", "/Library/Fonts", os.path.join(home, "Library", "Fonts")]
+    return ["/usr/share/fonts", "/usr/local/share/fonts",
+            os.path.join(home, ".local", "share", "fonts"), os.path.join(home, ".fonts")]
+
+
+def normalize_name(name):
+    """'DejaVu Sans' and 'DejaVuSans' both become 'dejavusans'"""
+    return "".join(c for c in name.lower() if c.isalnum())
+
+
+class FontRegistry:
+    def __init__(self, font_dirs=None, cache_size=32):
+        self.font_dirs = font_dirs or default_font_dirs()
+        self._files = None
+        self._paths = {}
+        self.truetype = functools.lru_cache(maxsize=cache_size)(self._load_truetype)
+
+    def font_files(self):
+        """Normalized file name -> path for every font under the font folders, scanned once"""
+        if self._files is None:
+            self._files = {}
+            for font_dir in self.font_dirs:
+                for root, _, files in os.walk(font_dir):
+                    for name in sorted(files):
+                        stem, ext = os.path.splitext(name)
+                        if ext.lower() in FONT_EXTENSIONS:
+                            self._files.setdefault(normalize_name(stem), os.path.join(root, name))
+        return self._files
+
+    def find(self, family=None):
+        """
+        Path of the regular face of family, or of the first default family
+        installed when family is None or missing. Returns None if nothing matches.
+        """
+        if family not in self._paths:
+            files = self.font_files()
+            path = None
+            for candidate in ([family] if family else []) + DEFAULT_FAMILIES:
+                key = normalize_name(candidate)
+                path = next((files[key + s] for s in REGULAR_SUFFIXES if key + s in files), None)
+                if path:
+                    break
+            self._paths[family] = path
+        return self._paths[family]
+
+    def _load_truetype(self, size, family=None):
+        """PIL font for family at size (pixels); PIL's built-in font if none is installed"""
+        path = self.find(family)
+        if path:
+            try:
+                return ImageFont.truetype(path, size)
+            except OSError as e:
+                print(f"Warning: Could not load font {path}: {e}", file=sys.stderr)
+        return ImageFont.load_default()
+
+
+# Shared per-process registry
+FONT_REGISTRY = FontRegistry()
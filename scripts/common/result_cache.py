@@ -0,0 +1,175 @@
+##
+ # LocalPDF Studio - Offline PDF Toolkit
+ # ======================================
+ #
+ # @author      Md. Alinur Hossain <alinur1160@gmail.com>
+ # @version     0.0.2
+ # @license     MPL-2.0 (Mozilla Public License 2.0)
+ # @website     https://alinur1.github.io/LocalPDF_Studio_Website/
+ # @repository  https://github.com/Alinur1/LocalPDF_Studio
+ #
+ # Copyright (c) 2025 Md. Alinur Hossain. All rights reserved.
+ #
+ # This Source Code Form is subject to the terms of the Mozilla Public
+ # License, v. 2.0. If a copy of the MPL was not distributed with this
+ # file, You can obtain one at https://mozilla.org/MPL/2.0/.
+ #
+ # Architecture:
+ # - Frontend: Electron + HTML/CSS/JS
+ # - Backend: ASP.NET Core Web API, Python
+ # - PDF Engine: PdfSharp + Mozilla PDF.js
+##
+
+# Content-addressed on-disk cache for tool results, shared by all tools.
+#
+# Entries are keyed by a hash of the input file bytes plus the normalized
+# option set. Each entry is a folder holding result.json and, for tools
+# that write a file, a copy of that output. Least recently used entries are
+# evicted once the cache grows past its size cap.
+#
+# Environment:
+#   LOCALPDF_CACHE=0          disable the cache
+#   LOCALPDF_CACHE_DIR=path   cache folder (default: <temp>/localpdf_studio_cache)
+#   LOCALPDF_CACHE_MAX_MB=n   size cap in MB (default: 512)
+
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import tempfile
+
+CACHE_FORMAT_VERSION = "1"
+RESULT_FILE = "result.json"
+OUTPUT_FILE = "output.bin"
+
+
+class ResultCache:
+    def __init__(self, tool_name, version="0.0.2"):
+        self.tool_name = tool_name
+        self.version = version
+        self.enabled = os.environ.get("LOCALPDF_CACHE", "1").lower() not in ("0", "false", "off")
+        self.cache_dir = os.environ.get("LOCALPDF_CACHE_DIR") or os.path.join(
+            tempfile.gettempdir(), "localpdf_studio_cache")
+        self.max_bytes = int(float(os.environ.get("LOCALPDF_CACHE_MAX_MB", "512")) * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, input_paths, options):
+        """Hash of the tool, the input file bytes and the normalized options"""
+        digest = hashlib.blake2b(digest_size=24)
+        digest.update(f"{CACHE_FORMAT_VERSION}|{self.tool_name}|{self.version}".encode())
+
+        for path in input_paths:
+            if not path:
+                continue
+            digest.update(b"|file|")
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+
+        digest.update(b"|options|")
+        digest.update(json.dumps(options, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def get(self, key, output_path=None):
+        """Return the cached result (copying its output file to output_path) or None"""
+        entry_dir = os.path.join(self.cache_dir, key)
+        result_file = os.path.join(entry_dir, RESULT_FILE)
+
+        try:
+            with open(result_file, "r", encoding="utf-8") as f:
+                result = json.load(f)
+
+            if output_path:
+                shutil.copyfile(os.path.join(entry_dir, OUTPUT_FILE), output_path)
+
+            # Touch the entry so eviction sees it as recently used
+            os.utime(entry_dir)
+            return result
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, result, output_path=None):
+        """Store a result (and a copy of output_path); errors never fail the job"""
+        entry_dir = os.path.join(self.cache_dir, key)
+        temp_dir = None
+
+        try:
+            # Storing it would only evict it again, along with everything else
+            if output_path and os.path.getsize(output_path) > self.max_bytes:
+                print("Warning: Output is larger than the cache, not caching it", file=sys.stderr)
+                return
+
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_dir = tempfile.mkdtemp(prefix=".tmp_", dir=self.cache_dir)
+
+            if output_path:
+                shutil.copyfile(output_path, os.path.join(temp_dir, OUTPUT_FILE))
+            with open(os.path.join(temp_dir, RESULT_FILE), "w", encoding="utf-8") as f:
+                json.dump(result, f)
+
+            # Another worker may have stored the same key meanwhile; keep theirs
+            if not os.path.exists(entry_dir):
+                os.replace(temp_dir, entry_dir)
+                temp_dir = None
+
+            self.evict()
+        except OSError as e:
+            print(f"Warning: Could not write cache entry: {e}", file=sys.stderr)
+        finally:
+            if temp_dir:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits its size cap"""
+        entries = []
+        total = 0
+
+        for name in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, name)
+            if name.startswith(".") or not os.path.isdir(entry_dir):
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(entry_dir, f))
+                for f in os.listdir(entry_dir)
+            )
+            entries.append((os.path.getmtime(entry_dir), size, entry_dir))
+            total += size
+
+        entries.sort()
+        while total > self.max_bytes and entries:
+            _, size, entry_dir = entries.pop(0)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+
+    def stats(self, hit):
+        return {"hit": hit, "hits": self.hits, "misses": self.misses}
+
+    def run(self, input_paths, options, output_path, compute, is_success):
+        """
+        Return compute() through the cache.
+
+        compute() must write output_path (when the tool produces a file) and
+        return the result dict. Only results accepted by is_success are stored.
+        Returns (result, cache stats).
+        """
+        if not self.enabled:
+            return compute(), None
+
+        try:
+            key = self.key(input_paths, options)
+        except OSError:
+            return compute(), None
+
+        cached = self.get(key, output_path)
+        if cached is not None:
+            self.hits += 1
+            return cached, self.stats(True)
+
+        self.misses += 1
+        result = compute()
+        if is_success(result):
+            self.put(key, result, output_path)
+        return result, self.stats(False)
@@ -0,0 +1,89 @@
+##
+ # LocalPDF Studio - Offline PDF Toolkit
+ # ======================================
+ #
+ # @author      Md. Alinur Hossain <alinur1160@gmail.com>
+ # @version     0.0.2
+ # @license     MPL-2.0 (Mozilla Public License 2.0)
+ # @website     https://alinur1.github.io/LocalPDF_Studio_Website/
+ # @repository  https://github.com/Alinur1/LocalPDF_Studio
+ #
+ # Copyright (c) 2025 Md. Alinur Hossain. All rights reserved.
+ #
+ # This Source Code Form is subject to the terms of the Mozilla Public
+ # License, v. 2.0. If a copy of the MPL was not distributed with this
+ # file, You can obtain one at https://mozilla.org/MPL/2.0/.
+ #
+ # Architecture:
+ # - Frontend: Electron + HTML/CSS/JS
+ # - Backend: ASP.NET Core Web API, Python
+ # - PDF Engine: PdfSharp + Mozilla PDF.js
+##
+
+# Shared helpers for the Python tools under scripts/.
+#
+# The tools import this module through scripts/common, so the PyInstaller
+# builds need that folder on the search path, e.g.:
+#   pyinstaller --onefile --name compress_pdf --paths ../common ... compress_pdf.py
+
+
+import sys
+import os
+import json
+import contextlib
+
+
+def run_worker(handler, tool_name):
+    """
+    Long-lived worker mode: read one JSON job per line from stdin and write
+    one JSON response per line to stdout until stdin closes.
+
+    Request:  {"id": "...", "command": "run", "params": {...}}
+              {"id": "...", "command": "ping"}
+              {"id": "...", "command": "shutdown"}
+    Response: {"id": "...", "success": true, "result": {...}}
+              {"id": "...", "success": false, "error": "..."}
+    """
+    protocol_out = sys.stdout
+    jobs_completed = 0
+
+    def reply(message):
+        protocol_out.write(json.dumps(message) + "\n")
+        protocol_out.flush()
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            reply({"id": None, "success": False, "error": f"Invalid JSON request: {str(e)}"})
+            continue
+
+        job_id = request.get("id")
+        command = request.get("command", "run")
+
+        if command == "ping":
+            reply({
+                "id": job_id,
+                "success": True,
+                "tool": tool_name,
+                "pid": os.getpid(),
+                "jobs_completed": jobs_completed
+            })
+        elif command == "shutdown":
+            reply({"id": job_id, "success": True})
+            break
+        elif command == "run":
+            try:
+                # Anything the tool prints must not corrupt the protocol stream
+                with contextlib.redirect_stdout(sys.stderr):
+                    result = handler(request.get("params") or {})
+                reply({"id": job_id, "success": True, "result": result})
+            except Exception as e:
+                reply({"id": job_id, "success": False, "error": str(e)})
+            jobs_completed += 1
+        else:
+            reply({"id": job_id, "success": False, "error": f"Unknown command: {command}"})
@@ -27,152 +27,1081 @@ import json
 from pathlib import Path
 from typing import Dict, Any
 import io
+import os
 import shutil
+import hashlib
+import math
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from tool_worker import run_worker
+from result_cache import ResultCache
+from batch_runner import run_batch
+from process_stats import reset_peak_rss, peak_rss_mb
 
 try:
     import pikepdf
-    from PIL import Image
+    import numpy as np
+    from PIL import Image, features
 except ImportError as e:
     print(json.dumps({
         "Success": False,
-        "Error": f"Required library not found: {str(e)}. Install: pip install pikepdf pillow"
+        "Error": f"Required library not found: {str(e)}. Install: pip install pikepdf pillow numpy"
     }))
     sys.exit(1)
 
 
-def compress_images_nuclear(pdf, quality):
+def nuclear_settings(quality):
+    """Map quality (1-100) to (max_dimension, jpeg_quality)"""
+    # EXTREME DOWNSAMPLING - NUCLEAR OPTION
+    if quality <= 10:
+        return 400, 5       # SUPER SMALL, EXTREME COMPRESSION
+    elif quality <= 30:
+        return 600, 10
+    elif quality <= 50:
+        return 800, 20
+    else:
+        return 1024, max(30, quality)
+
+
+def target_dimensions(width, height, max_dimension):
+    """Output size of a width x height image for a given max_dimension"""
+    # ALWAYS resize to maximum dimension
+    if width > max_dimension or height > max_dimension:
+        ratio = min(max_dimension / width, max_dimension / height)
+        return int(width * ratio), int(height * ratio)
+    # Even if under max, still resize to 80% for extra compression
+    return int(width * 0.8), int(height * 0.8)
+
+
+def bake_decode(pil_image, decode):
     """
-    NUCLEAR image compression - maximum aggression!
+    Apply the image's /Decode array (None = default) to JPEG pixels.
+    
+    pikepdf already applies /Decode when it decodes Flate and raw data, but
+    hands JPEGs over as they are. Pillow also inverts Adobe CMYK JPEGs,
+    whose samples PDF takes as stored, so that is undone first.
     """
-    print(f"DEBUG: Starting NUCLEAR compression with quality {quality}", file=sys.stderr)
-    images_processed = 0
+    bands = len(pil_image.getbands())
+    decode = decode or [0, 1] * bands
+    if len(decode) != 2 * bands:
+        raise ValueError(f"/Decode has {len(decode)} entries for {bands} components")
+    inverted = pil_image.mode == 'CMYK' and 'adobe' in pil_image.info
+    
+    table = []
+    for band in range(bands):
+        d_min, d_max = decode[2 * band], decode[2 * band + 1]
+        for value in range(256):
+            sample = (255 - value if inverted else value) / 255
+            table.append(round(255 * min(1, max(0, d_min + sample * (d_max - d_min)))))
+    
+    if table == list(range(256)) * bands:
+        return pil_image
+    return pil_image.point(table)
+
+
+def decode_for_size(pil_image, size, decode=None):
+    """
+    Decode pil_image as RGB or L, as small as cheaply possible for size,
+    with its /Decode array (a list of numbers, or None) applied.
+    
+    JPEGs that are not decoded yet are decoded by libjpeg straight at 1/2,
+    1/4 or 1/8 scale (DCT scaling, via Image.draft), never below size.
+    """
+    if pil_image.format == 'JPEG':
+        pil_image.draft(None, size)
+        pil_image = bake_decode(pil_image, decode)
+    
+    if pil_image.mode not in ('RGB', 'L'):
+        rgb_image = pil_image.convert('RGB')
+        pil_image.close()  # free the decoded original right away
+        pil_image = rgb_image
+    
+    return pil_image
+
+
+def shrink_for_resize(pil_image, size):
+    """
+    Remove any whole factor between a decoded image and size with a box
+    reduce() ahead of the final LANCZOS pass, keeping at least twice the
+    target size so the resample still has enough detail to work with.
+    """
+    factor = min(pil_image.width // size[0], pil_image.height // size[1]) // 2
+    if factor >= 2:
+        reduced = pil_image.reduce(factor)
+        pil_image.close()
+        pil_image = reduced
+    
+    return pil_image
+
+
+# Image classes, each with its own encoder:
+#   photo    RGB JPEG
+#   gray     DeviceGray JPEG
+#   bilevel  1-bit, CCITT G4 or Flate (whichever is smaller)
+#   palette  Indexed Flate with 1, 2, 4 or 8 bits per pixel
+# Channels may differ by this much and a pixel still counts as gray
+GRAY_TOLERANCE = 16
+# Gray levels strictly between these count as neither black nor white
+BILEVEL_DARK = 64
+BILEVEL_LIGHT = 192
+# Share of pixels allowed to break a class (JPEG noise, anti-aliased edges).
+# Coloured gray outliers must also be isolated: any 3x3 block of colour
+# (a stamp, a logo, a highlight) keeps the image in colour.
+GRAY_OUTLIER_FRACTION = 0.005
+BILEVEL_OUTLIER_FRACTION = 0.02
+PALETTE_OUTLIER_FRACTION = 0.005
+PALETTE_MAX_COLORS = 256
+# Pixels looked at by the classifier (evenly strided sample)
+CLASSIFY_SAMPLE_PIXELS = 250_000
+
+
+def has_colored_block(colored):
+    """True when some pixel of a boolean mask has all eight neighbours set too"""
+    if colored.shape[0] < 3 or colored.shape[1] < 3:
+        return False
+    rows = colored[:-2] & colored[1:-1] & colored[2:]
+    return bool(np.any(rows[:, :-2] & rows[:, 1:-1] & rows[:, 2:]))
+
+
+def classify_image(pil_image, source_mode):
+    """
+    Sort an image (RGB or L) into photo, gray, bilevel or palette with a few
+    vectorized passes over a pixel sample.
+    Returns (image class, palette as a list of RGB tuples or None).
+    """
+    if source_mode == '1':
+        return "bilevel", None
+    
+    # Nearest-neighbour shrink picks pixels without blending them
+    step = max(1, math.isqrt(pil_image.width * pil_image.height // CLASSIFY_SAMPLE_PIXELS))
+    if step > 1:
+        sample = np.asarray(pil_image.resize((pil_image.width // step, pil_image.height // step),
+                                             Image.Resampling.NEAREST))
+    else:
+        sample = np.asarray(pil_image)
+    total = sample.shape[0] * sample.shape[1]
+    
+    if sample.ndim == 3:
+        colored = (sample.max(axis=2).astype(np.int16) - sample.min(axis=2)) > GRAY_TOLERANCE
+        is_gray = (np.count_nonzero(colored) <= total * GRAY_OUTLIER_FRACTION and
+                   not has_colored_block(colored))
+        # ITU-R 601 weights, as PIL's convert('L')
+        luma = sample.astype(np.uint32) @ np.array([299, 587, 114], dtype=np.uint32) // 1000
+    else:
+        is_gray = True
+        luma = sample
+    
+    if is_gray:
+        midtones = np.count_nonzero((luma > BILEVEL_DARK) & (luma < BILEVEL_LIGHT))
+        return ("bilevel" if midtones <= total * BILEVEL_OUTLIER_FRACTION else "gray"), None
+    
+    # Flat colour art: a handful of colours cover nearly every pixel. A
+    # small sample already shows too many distinct colours for a photo.
+    packed = (sample[:, :, 0].astype(np.uint32) << 16) | (sample[:, :, 1].astype(np.uint32) << 8) | sample[:, :, 2]
+    coarse = packed[::8, ::8]
+    if len(np.unique(coarse)) > PALETTE_MAX_COLORS + coarse.size * PALETTE_OUTLIER_FRACTION:
+        return "photo", None
+    
+    colors, counts = np.unique(packed, return_counts=True)
+    top = np.argsort(counts)[::-1][:PALETTE_MAX_COLORS]
+    if counts[top].sum() >= total * (1 - PALETTE_OUTLIER_FRACTION):
+        palette = [(int(c) >> 16, (int(c) >> 8) & 0xFF, int(c) & 0xFF) for c in colors[top]]
+        return "palette", palette
+    
+    return "photo", None
+
+
+def pack_indices(indices, bits):
+    """Pack a 2-D array of small integers into PDF image rows of bits per pixel"""
+    if bits == 8:
+        return indices.astype(np.uint8).tobytes()
+    per_byte = 8 // bits
+    height, width = indices.shape
+    padded = np.zeros((height, -(-width // per_byte) * per_byte), dtype=np.uint8)
+    padded[:, :width] = indices
+    groups = padded.reshape(height, -1, per_byte)
+    shifts = np.arange(8 - bits, -1, -bits, dtype=np.uint8)
+    return np.bitwise_or.reduce(groups << shifts, axis=2).astype(np.uint8).tobytes()
+
+
+def encode_ccitt_g4(bilevel_image):
+    """
+    CCITT G4 encoding of a mode '1' image as (data, black is 1), or None
+    when Pillow lacks libtiff.
+    """
+    if not features.check('libtiff'):
+        return None
+    buffer = io.BytesIO()
+    # One strip, so the TIFF strip is exactly the PDF stream
+    bilevel_image.save(buffer, format='TIFF', compression='group4', tiffinfo={278: bilevel_image.height})
+    tiff = Image.open(buffer)
+    offsets, byte_counts = tiff.tag_v2[273], tiff.tag_v2[279]
+    if len(offsets) != 1:
+        return None
+    # libtiff codes 0 bits as white runs, so a BlackIsZero image (photometric
+    # 1, Pillow's default) comes out inverted unless the PDF says BlackIs1
+    return buffer.getvalue()[offsets[0]:offsets[0] + byte_counts[0]], tiff.tag_v2.get(262) == 1
+
+
+def recompress_image(pil_image, width, height, max_dimension, jpeg_quality, new_size=None, decode=None):
+    """
+    Decode, classify, resize and encode one image. Runs on a pool thread,
+    so it must not touch pikepdf objects; Pillow releases the GIL while it
+    works. new_size, when given, replaces the max_dimension rule; decode
+    is the image's /Decode array as plain numbers.
+    Returns a dict with data, width, height, image_class, filter,
+    decode_parms, color_space, bits and, for palette images, palette.
+    """
+    print(f"DEBUG: PIL image mode: {pil_image.mode}", file=sys.stderr)
+    source_mode = pil_image.mode
+    
+    new_width, new_height = new_size or target_dimensions(width, height, max_dimension)
+    print(f"DEBUG: NUKING size: {width}x{height} -> {new_width}x{new_height}", file=sys.stderr)
+    pil_image = decode_for_size(pil_image, (new_width, new_height), decode)
+    # Classify before the box reduce blurs black and white into gray
+    image_class, palette = classify_image(pil_image, source_mode)
+    print(f"DEBUG: Image class: {image_class}", file=sys.stderr)
+    pil_image = shrink_for_resize(pil_image, (new_width, new_height))
+    
+    if image_class in ("gray", "bilevel") and pil_image.mode != 'L':
+        gray_image = pil_image.convert('L')
+        pil_image.close()
+        pil_image = gray_image
+    resized = pil_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+    pil_image.close()
+    
+    encoded = {
+        "width": new_width,
+        "height": new_height,
+        "image_class": image_class,
+        "decode_parms": None,
+        "palette": None
+    }
+    
+    if image_class == "bilevel":
+        bilevel = resized.point(lambda v: 255 if v >= 128 else 0).convert('1', dither=Image.Dither.NONE)
+        flate_data = zlib.compress(bilevel.tobytes(), 9)
+        g4 = encode_ccitt_g4(bilevel)
+        if g4 is not None and len(g4[0]) < len(flate_data):
+            encoded.update(data=g4[0], filter="/CCITTFaxDecode", decode_parms={
+                "/K": -1, "/Columns": new_width, "/Rows": new_height, "/BlackIs1": g4[1]})
+        else:
+            encoded.update(data=flate_data, filter="/FlateDecode")
+        encoded.update(color_space="/DeviceGray", bits=1)
+        bilevel.close()
+    elif image_class == "palette":
+        palette_image = Image.new('P', (1, 1))
+        palette_image.putpalette([channel for color in palette for channel in color])
+        # Snap resampled edge pixels back onto the original colours
+        indexed = resized.quantize(palette=palette_image, dither=Image.Dither.NONE)
+        bits = next(b for b in (1, 2, 4, 8) if len(palette) <= 1 << b)
+        indices = pack_indices(np.asarray(indexed), bits)
+        encoded.update(data=zlib.compress(indices, 9), filter="/FlateDecode", color_space="/Indexed",
+                       bits=bits, palette=bytes(channel for color in palette for channel in color))
+        indexed.close()
+    else:
+        # Save as JPEG with MAXIMUM compression
+        img_byte_arr = io.BytesIO()
+        resized.save(img_byte_arr, format='JPEG', quality=jpeg_quality, optimize=True)
+        encoded.update(data=img_byte_arr.getvalue(), filter="/DCTDecode", bits=8,
+                       color_space="/DeviceGray" if image_class == "gray" else "/DeviceRGB")
+    resized.close()
+    
+    return encoded
+
+
+def write_back_image(raw_image, image_key, future, decision=None):
+    """
+    Store a recompressed image in the PDF (main thread only), unless the
+    new stream is no smaller than the one already there.
+    Returns True when the image was replaced.
+    """
+    try:
+        encoded = future.result()
+        print(f"DEBUG: NUKED image size: {len(encoded['data'])} bytes", file=sys.stderr)
+        original_bytes = len(raw_image.read_raw_bytes())
+        bytes_saved = original_bytes - len(encoded['data'])
+        if decision is not None:
+            decision.update(new_bytes=len(encoded['data']), image_class=encoded['image_class'])
+        
+        if bytes_saved <= 0:
+            print(f"DEBUG: Keeping original image {image_key}, re-encode is not smaller", file=sys.stderr)
+            if decision is not None:
+                decision.update(action="kept_original", reason="not_smaller", bytes_saved=0)
+            return False
+        if decision is not None:
+            decision["bytes_saved"] = bytes_saved
+        
+        # Replace the image stream data
+        decode_parms = pikepdf.Dictionary(encoded['decode_parms']) if encoded['decode_parms'] else None
+        raw_image.write(encoded['data'], filter=pikepdf.Name(encoded['filter']), decode_parms=decode_parms)
+        if decode_parms is None and '/DecodeParms' in raw_image:
+            del raw_image['/DecodeParms']
+        
+        # Update image dimensions
+        raw_image['/Width'] = encoded['width']
+        raw_image['/Height'] = encoded['height']
+        if encoded['palette']:
+            raw_image['/ColorSpace'] = pikepdf.Array([
+                pikepdf.Name('/Indexed'), pikepdf.Name('/DeviceRGB'),
+                len(encoded['palette']) // 3 - 1, pikepdf.String(encoded['palette'])
+            ])
+        else:
+            raw_image['/ColorSpace'] = pikepdf.Name(encoded['color_space'])
+        raw_image['/BitsPerComponent'] = encoded['bits']
+        # The new pixels already have any /Decode mapping applied
+        if '/Decode' in raw_image:
+            del raw_image['/Decode']
+        
+        print(f"DEBUG: Successfully NUKED image {image_key}", file=sys.stderr)
+        return True
+    except Exception as e:
+        print(f"DEBUG: Failed to nuke image {image_key}: {str(e)}", file=sys.stderr)
+        if decision is not None:
+            decision.update(action="failed", reason=str(e))
+        return False
+
+
+# Typical JPEG output size in bits per pixel by quality (interpolated in
+# between), measured from PIL encodes (optimize=True, 4:2:0 subsampling) of
+# photos resized to 1024px. Busier images come out larger; erring low only
+# means a few more images get re-encoded and then kept by the size check.
+JPEG_BITS_PER_PIXEL = [
+    (5, 0.06), (10, 0.08), (20, 0.12), (30, 0.16), (50, 0.25),
+    (75, 0.42), (85, 0.6), (90, 0.8), (95, 1.25), (100, 2.7)
+]
+
+# Recompress only when the predicted saving is at least this many percent
+DEFAULT_MIN_IMAGE_SAVING_PERCENT = 10
+
+
+def predict_jpeg_bytes(width, height, jpeg_quality):
+    """Expected JPEG size for a width x height image, without encoding anything"""
+    points = JPEG_BITS_PER_PIXEL
+    if jpeg_quality <= points[0][0]:
+        bits = points[0][1]
+    else:
+        bits = points[-1][1]
+        for (q0, b0), (q1, b1) in zip(points, points[1:]):
+            if jpeg_quality <= q1:
+                bits = b0 + (b1 - b0) * (jpeg_quality - q0) / (q1 - q0)
+                break
+    return int(width * height * bits / 8)
+
+
+def stream_filters(raw_image):
+    """Filter names of a stream as a list, e.g. ['/FlateDecode']"""
+    filters = raw_image.get('/Filter')
+    if filters is None:
+        return []
+    if isinstance(filters, pikepdf.Array):
+        return [str(f) for f in filters]
+    return [str(filters)]
+
+
+def collect_unique_images(pdf):
+    """
+    Walk every page once and return (unique images, total references).
+    An image XObject shared by many pages (logo, letterhead) is listed once,
+    keyed by its object number, so it is recompressed and rewritten only once.
+    """
+    unique_images = {}
+    references = 0
     
     for page_num, page in enumerate(pdf.pages):
         try:
-            images = list(page.images.keys())
+            images = list(page.images.items())
             print(f"DEBUG: Page {page_num} has {len(images)} images", file=sys.stderr)
             
-            for image_key in images:
-                try:
-                    print(f"DEBUG: NUKING image {image_key}", file=sys.stderr)
-                    raw_image = page.images[image_key]
-                    pdfimage = pikepdf.PdfImage(raw_image)
+            for image_key, raw_image in images:
+                references += 1
+                # Direct (non-shared) objects have objgen (0, 0), keep them apart
+                key = raw_image.objgen if raw_image.is_indirect else ('direct', page_num, str(image_key))
+                if key not in unique_images:
+                    unique_images[key] = (raw_image, image_key)
                     
-                    # Get image properties
-                    width = pdfimage.width
-                    height = pdfimage.height
-                    print(f"DEBUG: Original size: {width}x{height}", file=sys.stderr)
-                    
-                    # Skip only VERY small images (under 1000 pixels total)
-                    if width * height < 1000:
-                        print(f"DEBUG: Skipping tiny image", file=sys.stderr)
+        except Exception as e:
+            print(f"DEBUG: Error reading images on page {page_num}: {str(e)}", file=sys.stderr)
+            continue
+    
+    return list(unique_images.values()), references
+
+
+def image_placement_dpi(pdf):
+    """
+    Effective resolution of every image XObject as drawn on the pages.
+    
+    Content streams (and the form XObjects they call) are walked with their
+    q/Q/cm state; at each "Do" of an image the current matrix gives the size
+    it is drawn at. Returns {image objgen: DPI}, using the largest placement
+    of each image (its lowest DPI), so downsampling never starves any use.
+    """
+    placement_dpi = {}
+    
+    def walk(content, resources, ctm, active_forms):
+        stack = []
+        xobjects = resources.get('/XObject') if resources is not None else None
+        
+        for operands, operator in pikepdf.parse_content_stream(content, 'q Q cm Do'):
+            op = str(operator)
+            if op == 'q':
+                stack.append(ctm)
+            elif op == 'Q':
+                if stack:
+                    ctm = stack.pop()
+            elif op == 'cm':
+                ctm = pikepdf.Matrix(*[float(v) for v in operands]) @ ctm
+            elif op == 'Do' and xobjects is not None:
+                xobject = xobjects.get(operands[0])
+                if not isinstance(xobject, pikepdf.Stream):
+                    continue
+                subtype = xobject.get('/Subtype')
+                
+                if subtype == '/Image':
+                    # The image fills the unit square; its edges map to (a, b) and (c, d)
+                    placed_width = math.hypot(ctm.a, ctm.b) / 72
+                    placed_height = math.hypot(ctm.c, ctm.d) / 72
+                    if placed_width <= 0 or placed_height <= 0:
                         continue
+                    dpi = min(int(xobject.Width) / placed_width, int(xobject.Height) / placed_height)
+                    key = xobject.objgen
+                    placement_dpi[key] = min(dpi, placement_dpi.get(key, dpi))
                     
-                    # Extract as PIL image
-                    pil_image = pdfimage.as_pil_image()
-                    print(f"DEBUG: PIL image mode: {pil_image.mode}", file=sys.stderr)
-                    
-                    # Convert to RGB if needed (SIMPLIFIED)
-                    if pil_image.mode != 'RGB':
-                        pil_image = pil_image.convert('RGB')
-                    
-                    # EXTREME DOWNSAMPLING - NUCLEAR OPTION
-                    if quality <= 10:
-                        max_dimension = 400    # SUPER SMALL
-                        jpeg_quality = 5       # EXTREME COMPRESSION
-                    elif quality <= 30:
-                        max_dimension = 600
-                        jpeg_quality = 10
-                    elif quality <= 50:
-                        max_dimension = 800
-                        jpeg_quality = 20
-                    else:
-                        max_dimension = 1024
-                        jpeg_quality = max(30, quality)
-                    
-                    print(f"DEBUG: NUCLEAR SETTINGS - Max: {max_dimension}px, Quality: {jpeg_quality}", file=sys.stderr)
-                    
-                    # ALWAYS resize to maximum dimension
-                    if width > max_dimension or height > max_dimension:
-                        ratio = min(max_dimension / width, max_dimension / height)
-                        new_width = int(width * ratio)
-                        new_height = int(height * ratio)
-                        print(f"DEBUG: NUKING size: {width}x{height} -> {new_width}x{new_height}", file=sys.stderr)
-                        pil_image = pil_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                    else:
-                        # Even if under max, still resize to 80% for extra compression
-                        new_width = int(width * 0.8)
-                        new_height = int(height * 0.8)
-                        print(f"DEBUG: Still nuking: {width}x{height} -> {new_width}x{new_height}", file=sys.stderr)
-                        pil_image = pil_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                    
-                    # Save as JPEG with MAXIMUM compression
-                    img_byte_arr = io.BytesIO()
-                    pil_image.save(img_byte_arr, format='JPEG', quality=jpeg_quality, optimize=True)
-                    img_data = img_byte_arr.getvalue()
-                    
-                    print(f"DEBUG: NUKED image size: {len(img_data)} bytes", file=sys.stderr)
-                    
-                    # Replace the image stream data
-                    raw_image.write(img_data, filter=pikepdf.Name("/DCTDecode"))
-                    
-                    # Update image dimensions
-                    raw_image['/Width'] = pil_image.width
-                    raw_image['/Height'] = pil_image.height
-                    raw_image['/ColorSpace'] = pikepdf.Name('/DeviceRGB')
-                    raw_image['/BitsPerComponent'] = 8
-                    
-                    images_processed += 1
-                    print(f"DEBUG: Successfully NUKED image {image_key}", file=sys.stderr)
-                    
-                except Exception as e:
-                    print(f"DEBUG: Failed to nuke image {image_key}: {str(e)}", file=sys.stderr)
+                elif subtype == '/Form' and xobject.objgen not in active_forms:
+                    form_matrix = pikepdf.Matrix(*[float(v) for v in xobject.get('/Matrix', [1, 0, 0, 1, 0, 0])])
+                    walk(xobject, xobject.get('/Resources', resources), form_matrix @ ctm,
+                         active_forms | {xobject.objgen})
+    
+    for page_num, page in enumerate(pdf.pages):
+        try:
+            walk(page, page.get('/Resources'), pikepdf.Matrix(), frozenset())
+        except Exception as e:
+            print(f"DEBUG: Could not read image placements on page {page_num}: {str(e)}", file=sys.stderr)
+    
+    return placement_dpi
+
+
+RESULT_CACHE = ResultCache('compress_pdf')
+
+# Options that only change how fast the job runs, not its output
+NON_OUTPUT_OPTIONS = {'image_workers', 'memory_limit_mb'}
+
+
+def estimate_decoded_bytes(width, height):
+    """Worst-case memory for one image in flight: 4 bytes/pixel (CMYK/RGBA) decoded plus an RGB copy"""
+    return width * height * 7
+
+
+def compress_images_nuclear(pdf, quality, workers=0, memory_budget=0, settings=None, target_dpi=0,
+                            min_saving_percent=DEFAULT_MIN_IMAGE_SAVING_PERCENT):
+    """
+    NUCLEAR image compression - maximum aggression!
+    
+    Unique images are read from the PDF on the main thread, decoded/resized/
+    encoded on a thread pool of `workers` threads (0 = one per CPU core), and
+    written back on the main thread as results come in.
+    
+    With a memory_budget (bytes), images in flight are also capped by their
+    estimated decoded size, so a batch of huge scans waits for earlier ones
+    to finish instead of being decoded all at once.
+    
+    settings, a (max_dimension, jpeg_quality) pair, overrides the quality buckets.
+    
+    With a target_dpi, images are sized by how large they are drawn instead:
+    ones at or below target_dpi are left untouched, others are scaled down to
+    exactly target_dpi. Images whose placement is unknown keep the
+    max_dimension rule.
+    
+    Before anything is decoded, each image's current bits per pixel and
+    filter are read from its stream dictionary. For JPEG sources the JPEG
+    size at the new settings is predicted, and images whose predicted saving
+    is under min_saving_percent (None = never skip) are left as they are.
+    Other sources may turn out gray, bilevel or palette, whose encoders beat
+    any JPEG estimate, so they are always tried. Every image gets an entry in
+    the returned "decisions" list. A re-encoded image only replaces the
+    original when its stream is smaller, so no single image can grow.
+    
+    Returns a dict with processed, unique and referenced image counts.
+    """
+    print(f"DEBUG: Starting NUCLEAR compression with quality {quality}", file=sys.stderr)
+    images_processed = 0
+    
+    max_dimension, jpeg_quality = settings or nuclear_settings(quality)
+    print(f"DEBUG: NUCLEAR SETTINGS - Max: {max_dimension}px, Quality: {jpeg_quality}", file=sys.stderr)
+    
+    unique_images, references = collect_unique_images(pdf)
+    print(f"DEBUG: {len(unique_images)} unique images, {references} references", file=sys.stderr)
+    
+    placement_dpi = image_placement_dpi(pdf) if target_dpi > 0 else {}
+    images_skipped_dpi = 0
+    images_skipped_analysis = 0
+    decisions = []
+    
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Bounded window of in-flight images keeps memory flat on big documents
+        pending = deque()
+        in_flight_bytes = 0
+        
+        for raw_image, image_key in unique_images:
+            try:
+                print(f"DEBUG: NUKING image {image_key}", file=sys.stderr)
+                pdfimage = pikepdf.PdfImage(raw_image)
+                
+                # Get image properties
+                width = pdfimage.width
+                height = pdfimage.height
+                print(f"DEBUG: Original size: {width}x{height}", file=sys.stderr)
+                
+                original_bytes = int(raw_image.get('/Length', 0))
+                decision = {
+                    "object": f"{raw_image.objgen[0]} {raw_image.objgen[1]}",
+                    "width": width,
+                    "height": height,
+                    "filter": stream_filters(raw_image),
+                    "original_bytes": original_bytes,
+                    "bits_per_pixel": round(original_bytes * 8 / max(1, width * height), 3)
+                }
+                decisions.append(decision)
+                
+                # Skip only VERY small images (under 1000 pixels total)
+                if width * height < 1000:
+                    print(f"DEBUG: Skipping tiny image", file=sys.stderr)
+                    decision.update(action="skip", reason="tiny")
                     continue
-                    
+                
+                # Stencil masks paint with the fill colour; a JPEG would turn them into boxes
+                if raw_image.get('/ImageMask'):
+                    decision.update(action="skip", reason="image_mask")
+                    continue
+                
+                # Size by effective resolution on the page when it is known
+                new_size = None
+                dpi = placement_dpi.get(raw_image.objgen)
+                if dpi is not None:
+                    decision["dpi"] = round(dpi, 1)
+                    if dpi <= target_dpi:
+                        print(f"DEBUG: Skipping image at {dpi:.0f} DPI (target {target_dpi})", file=sys.stderr)
+                        decision.update(action="skip", reason="at_target_dpi")
+                        images_skipped_dpi += 1
+                        continue
+                    scale = target_dpi / dpi
+                    new_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+                
+                # Cheap pre-analysis: is re-encoding a JPEG likely to pay off at all?
+                if min_saving_percent is not None and decision["filter"] == ['/DCTDecode']:
+                    predicted_bytes = predict_jpeg_bytes(
+                        *(new_size or target_dimensions(width, height, max_dimension)), jpeg_quality)
+                    predicted_saving = 100 * (1 - predicted_bytes / original_bytes) if original_bytes else 0
+                    decision.update(predicted_bytes=predicted_bytes,
+                                    predicted_saving_percent=round(predicted_saving, 1))
+                    if predicted_saving < min_saving_percent:
+                        print(f"DEBUG: Skipping image, predicted saving {predicted_saving:.0f}%", file=sys.stderr)
+                        decision.update(action="skip", reason="predicted_saving_below_threshold")
+                        images_skipped_analysis += 1
+                        continue
+                decision["action"] = "recompress"
+                
+                # Make room before decoding the next image (always allow one in flight)
+                estimate = estimate_decoded_bytes(width, height)
+                while pending and (len(pending) >= workers * 2 or
+                                   (memory_budget and in_flight_bytes + estimate > memory_budget)):
+                    raw, key, done_future, done_estimate, done_decision = pending.popleft()
+                    images_processed += write_back_image(raw, key, done_future, done_decision)
+                    in_flight_bytes -= done_estimate
+                
+                # Extract as PIL image (JPEG data is only decoded on the pool thread)
+                pil_image = pdfimage.as_pil_image()
+                decode = [float(v) for v in raw_image.Decode] if '/Decode' in raw_image else None
+                
+                future = pool.submit(recompress_image, pil_image, width, height, max_dimension, jpeg_quality,
+                                     new_size, decode)
+                pending.append((raw_image, image_key, future, estimate, decision))
+                in_flight_bytes += estimate
+                del pil_image, pdfimage
+                
+            except Exception as e:
+                print(f"DEBUG: Failed to nuke image {image_key}: {str(e)}", file=sys.stderr)
+                continue
+        
+        while pending:
+            raw, key, done_future, _, done_decision = pending.popleft()
+            images_processed += write_back_image(raw, key, done_future, done_decision)
+    
+    print(f"DEBUG: NUKED {images_processed} images", file=sys.stderr)
+    return {
+        "images_processed": images_processed,
+        "images_kept_original": sum(1 for d in decisions if d.get("action") == "kept_original"),
+        "image_bytes_saved": sum(d.get("bytes_saved", 0) for d in decisions),
+        "unique_images": len(unique_images),
+        "image_references": references,
+        "images_skipped_dpi": images_skipped_dpi,
+        "images_skipped_analysis": images_skipped_analysis,
+        "decisions": decisions
+    }
+
+
+# Target-size search space, largest output first
+TARGET_MAX_DIMENSIONS = [2048, 1600, 1280, 1024, 800, 600, 400]
+TARGET_MIN_JPEG_QUALITY = 5
+TARGET_MAX_JPEG_QUALITY = 95
+# Below this quality, shrinking the images looks better than more JPEG artifacts
+TARGET_PREFERRED_MIN_QUALITY = 40
+TARGET_SAMPLE_IMAGES = 6
+
+
+def encoded_size(pil_image, jpeg_quality):
+    buffer = io.BytesIO()
+    pil_image.save(buffer, format='JPEG', quality=jpeg_quality, optimize=True)
+    return buffer.tell()
+
+
+def choose_target_settings(pdf, target_bytes, original_size):
+    """
+    Pick (max_dimension, jpeg_quality) so the output should fit target_bytes.
+    
+    A few sample images are decoded once and re-encoded at candidate
+    settings; their size per output pixel is scaled up to every image in
+    the document, plus the bytes that are not images. For each max_dimension,
+    largest first, JPEG quality is binary-searched; the first dimension that
+    fits at a reasonable quality wins. Returns None when there is nothing to tune.
+    """
+    unique_images, _ = collect_unique_images(pdf)
+    
+    candidates = []
+    image_bytes = 0
+    for raw_image, image_key in unique_images:
+        try:
+            width, height = int(raw_image.Width), int(raw_image.Height)
+        except Exception:
+            continue
+        # Same rule as compress_images_nuclear: tiny images are left alone
+        if width * height < 1000:
+            continue
+        candidates.append((raw_image, width, height))
+        image_bytes += int(raw_image.get('/Length', 0))
+    
+    if not candidates:
+        return None
+    
+    fixed_bytes = max(0, original_size - image_bytes)
+    
+    # Evenly spread samples over the images ordered by size
+    by_area = sorted(candidates, key=lambda c: c[1] * c[2])
+    step = max(1, len(by_area) // TARGET_SAMPLE_IMAGES)
+    samples = []
+    for raw_image, width, height in by_area[::step][:TARGET_SAMPLE_IMAGES]:
+        try:
+            pil_image = pikepdf.PdfImage(raw_image).as_pil_image()
+            # Shrink once to the largest candidate size; smaller ones resize from this copy
+            largest = target_dimensions(width, height, TARGET_MAX_DIMENSIONS[0])
+            pil_image = shrink_for_resize(decode_for_size(pil_image, largest), largest)
+            if largest != pil_image.size:
+                pil_image = pil_image.resize(largest, Image.Resampling.LANCZOS)
+            samples.append((pil_image, width, height))
         except Exception as e:
-            print(f"DEBUG: Error nuking page {page_num}: {str(e)}", file=sys.stderr)
+            print(f"DEBUG: Could not sample image: {str(e)}", file=sys.stderr)
+    
+    if not samples:
+        return None
+    
+    evaluations = 0
+    fallback = None
+    
+    for max_dimension in TARGET_MAX_DIMENSIONS:
+        resized = [
+            pil_image.resize(target_dimensions(w, h, max_dimension), Image.Resampling.LANCZOS)
+            for pil_image, w, h in samples
+        ]
+        sample_pixels = sum(img.width * img.height for img in resized)
+        total_pixels = sum(
+            nw * nh for nw, nh in (target_dimensions(w, h, max_dimension) for _, w, h in candidates)
+        )
+        
+        def estimate(jpeg_quality):
+            nonlocal evaluations
+            evaluations += 1
+            sample_bytes = sum(encoded_size(img, jpeg_quality) for img in resized)
+            return fixed_bytes + int(sample_bytes * total_pixels / max(1, sample_pixels))
+        
+        # Highest quality whose estimate still fits
+        low, high = TARGET_MIN_JPEG_QUALITY, TARGET_MAX_JPEG_QUALITY
+        best = None
+        if estimate(low) <= target_bytes:
+            while low <= high:
+                mid = (low + high) // 2
+                size = estimate(mid)
+                if size <= target_bytes:
+                    best = (mid, size)
+                    low = mid + 1
+                else:
+                    high = mid - 1
+        
+        print(f"DEBUG: Target search {max_dimension}px -> {best}", file=sys.stderr)
+        
+        if best:
+            choice = {"max_dimension": max_dimension, "jpeg_quality": best[0], "estimated_size": best[1]}
+            if best[0] >= TARGET_PREFERRED_MIN_QUALITY:
+                fallback = choice
+                break
+            fallback = fallback or choice
+    
+    for pil_image, _, _ in samples:
+        pil_image.close()
+    
+    # Nothing fits: use the smallest settings and let the result say the target was missed
+    choice = fallback or {
+        "max_dimension": TARGET_MAX_DIMENSIONS[-1],
+        "jpeg_quality": TARGET_MIN_JPEG_QUALITY,
+        "estimated_size": None
+    }
+    choice["evaluations"] = evaluations
+    return choice
+
+
+# Stream dictionary entries that change how identical bytes decode
+IMAGE_SIGNATURE_KEYS = (
+    '/Filter', '/DecodeParms', '/Width', '/Height', '/BitsPerComponent',
+    '/ColorSpace', '/Decode', '/ImageMask', '/Mask', '/SMask', '/Intent', '/Interpolate'
+)
+
+
+def image_signature(raw_image):
+    """Content hash of an image: its filtered stream bytes plus decode parameters"""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(raw_image.read_raw_bytes())
+    
+    for key in IMAGE_SIGNATURE_KEYS:
+        value = raw_image.get(key)
+        if value is None:
             continue
+        digest.update(key.encode())
+        # Indirect references unparse as "N G R", so shared colour spaces/masks compare by identity
+        digest.update(value.unparse() if isinstance(value, pikepdf.Object) else str(value).encode())
     
-    print(f"DEBUG: NUKED {images_processed} images", file=sys.stderr)
-    return images_processed > 0
+    return digest.digest()
 
 
 def remove_duplicate_images(pdf):
     """
-    Remove duplicate images to save even more space!
+    Merge byte-identical images into one shared XObject.
+    
+    Every page that references a duplicate is pointed at the first copy;
+    the orphaned copies are then dropped when the PDF is saved.
     """
     print("DEBUG: Removing duplicate images...", file=sys.stderr)
-    image_hashes = {}
-    duplicates_removed = 0
+    canonical_images = {}
+    merged_objects = set()
+    references_rewritten = 0
+    bytes_saved = 0
     
     for page_num, page in enumerate(pdf.pages):
         try:
-            for image_key in list(page.images.keys()):
+            for image_key, raw_image in list(page.images.items()):
                 try:
-                    raw_image = page.images[image_key]
+                    # Only shared (indirect) objects can be pointed at from other pages
+                    if not raw_image.is_indirect:
+                        continue
+                    
+                    signature = image_signature(raw_image)
+                    canonical = canonical_images.setdefault(signature, raw_image)
+                    
+                    if canonical.objgen == raw_image.objgen:
+                        continue
                     
-                    # Create a simple hash of image properties
-                    image_hash = f"{raw_image.get('/Width', 0)}x{raw_image.get('/Height', 0)}"
+                    print(f"DEBUG: Merging duplicate image {image_key} {raw_image.objgen} on page {page_num} into {canonical.objgen}", file=sys.stderr)
+                    page.resources.XObject[image_key] = canonical
+                    references_rewritten += 1
                     
-                    if image_hash in image_hashes:
-                        # This is a duplicate - remove it!
-                        print(f"DEBUG: Removing duplicate image {image_key} on page {page_num}", file=sys.stderr)
-                        del page.images[image_key]
-                        duplicates_removed += 1
-                    else:
-                        image_hashes[image_hash] = True
+                    if raw_image.objgen not in merged_objects:
+                        merged_objects.add(raw_image.objgen)
+                        bytes_saved += len(raw_image.read_raw_bytes())
                         
                 except Exception as e:
+                    print(f"DEBUG: Failed to check image {image_key} on page {page_num}: {str(e)}", file=sys.stderr)
                     continue
                     
         except Exception as e:
             continue
     
-    print(f"DEBUG: Removed {duplicates_removed} duplicate images", file=sys.stderr)
-    return duplicates_removed
+    print(f"DEBUG: Merged {len(merged_objects)} duplicate images, {bytes_saved} bytes saved", file=sys.stderr)
+    return {
+        "duplicates_merged": len(merged_objects),
+        "references_rewritten": references_rewritten,
+        "bytes_saved": bytes_saved
+    }
+
+
+# Named resource categories that content stream operators refer to
+RESOURCE_CATEGORIES = ('/XObject', '/Font', '/ExtGState', '/ColorSpace', '/Pattern', '/Shading', '/Properties')
+DEVICE_COLOR_SPACES = ('/DeviceGray', '/DeviceRGB', '/DeviceCMYK', '/Pattern')
+
+
+def remove_unused_resources(pdf):
+    """
+    Drop /Resources entries that no content stream uses.
+    
+    Page content, form XObjects, tiling patterns, Type3 glyphs, soft mask
+    groups and annotation appearances are parsed, and every name used by
+    Do, Tf, gs, cs/CS, scn/SCN, sh and BDC/DP is recorded against the
+    category dictionary it resolves in. A category dictionary shared by
+    several pages or forms is only pruned by the union of their names.
+    Dictionaries that cannot be fully accounted for (unparsable content,
+    holders that were never walked, AcroForm /DR) are left alone.
+    Objects that end up unreferenced are dropped by the save.
+    
+    Returns a dict with removed entry and parsed content stream counts.
+    """
+    print("DEBUG: Removing unused resources...", file=sys.stderr)
+    used_names = {}
+    category_dicts = {}
+    keep_all = set()
+    walked = set()
+    walked_holders = set()
+    
+    def category_key(resources, holder, category):
+        category_dict = resources.get(category)
+        if not isinstance(category_dict, pikepdf.Dictionary):
+            return None
+        if category_dict.is_indirect:
+            key = category_dict.objgen
+        elif resources.is_indirect:
+            key = (resources.objgen, category)
+        elif holder is not None and holder.is_indirect:
+            key = (holder.objgen, '/Resources', category)
+        else:
+            return None
+        category_dicts[key] = category_dict
+        used_names.setdefault(key, set())
+        return key
+    
+    def keep_resources(resources, holder):
+        for category in RESOURCE_CATEGORIES:
+            key = category_key(resources, holder, category)
+            if key is not None:
+                keep_all.add(key)
+    
+    def use(resources, holder, category, name):
+        """Record a name and return the resource it resolves to (or None)"""
+        key = category_key(resources, holder, category)
+        if key is None:
+            return None
+        used_names[key].add(str(name))
+        return category_dicts[key].get(name)
+    
+    def walk(content, resources, holder):
+        if not isinstance(resources, pikepdf.Dictionary):
+            return
+        if holder is not None and holder.is_indirect:
+            walked_holders.add(holder.objgen)
+        owner = resources if resources.is_indirect else holder
+        visit = (content.objgen, owner.objgen if owner is not None else None)
+        if visit in walked:
+            return
+        walked.add(visit)
+        
+        try:
+            instructions = pikepdf.parse_content_stream(content)
+        except Exception as e:
+            print(f"DEBUG: Could not parse content {content.objgen}: {str(e)}", file=sys.stderr)
+            keep_resources(resources, holder)
+            return
+        
+        for instruction in instructions:
+            operator = str(instruction.operator)
+            operands = instruction.operands
+            
+            if operator == 'INLINE IMAGE':
+                # Inline images may name a colour space resource in their own dictionary
+                key = category_key(resources, holder, '/ColorSpace')
+                if key is not None:
+                    keep_all.add(key)
+            elif operator == 'Do' and operands:
+                xobject = use(resources, holder, '/XObject', operands[0])
+                if isinstance(xobject, pikepdf.Stream) and xobject.get('/Subtype') == '/Form':
+                    walk_form(xobject, resources, holder)
+            elif operator == 'Tf' and operands:
+                font = use(resources, holder, '/Font', operands[0])
+                if isinstance(font, pikepdf.Dictionary) and font.get('/Subtype') == '/Type3':
+                    own = font.get('/Resources')
+                    char_procs = font.get('/CharProcs')
+                    for glyph in char_procs.values() if isinstance(char_procs, pikepdf.Dictionary) else []:
+                        if isinstance(glyph, pikepdf.Stream):
+                            walk(glyph, own or resources, font if own else holder)
+            elif operator == 'gs' and operands:
+                state = use(resources, holder, '/ExtGState', operands[0])
+                soft_mask = state.get('/SMask') if isinstance(state, pikepdf.Dictionary) else None
+                if isinstance(soft_mask, pikepdf.Dictionary) and isinstance(soft_mask.get('/G'), pikepdf.Stream):
+                    walk_form(soft_mask.G, resources, holder)
+            elif operator in ('cs', 'CS') and operands:
+                if str(operands[0]) not in DEVICE_COLOR_SPACES:
+                    use(resources, holder, '/ColorSpace', operands[0])
+            elif operator in ('scn', 'SCN') and operands and isinstance(operands[-1], pikepdf.Name):
+                pattern = use(resources, holder, '/Pattern', operands[-1])
+                if isinstance(pattern, pikepdf.Stream) and pattern.get('/PatternType') == 1:
+                    walk_form(pattern, resources, holder)
+            elif operator == 'sh' and operands:
+                use(resources, holder, '/Shading', operands[0])
+            elif operator in ('BDC', 'DP') and len(operands) > 1 and isinstance(operands[1], pikepdf.Name):
+                use(resources, holder, '/Properties', operands[1])
+    
+    def walk_form(stream, parent_resources, parent_holder):
+        """Walk a form-like stream; without its own /Resources it uses its parent's"""
+        own = stream.get('/Resources')
+        if own is not None:
+            walk(stream, own, stream)
+        else:
+            walk(stream, parent_resources, parent_holder)
+    
+    def inherited_resources(page_obj):
+        node = page_obj
+        while isinstance(node, pikepdf.Dictionary):
+            if '/Resources' in node:
+                return node.Resources, node
+            node = node.get('/Parent')
+        return None, None
+    
+    for page in pdf.pages:
+        resources, holder = inherited_resources(page.obj)
+        walk(page.obj, resources, holder)
+        
+        for annot in page.obj.get('/Annots') or []:
+            appearances = annot.get('/AP') if isinstance(annot, pikepdf.Dictionary) else None
+            if not isinstance(appearances, pikepdf.Dictionary):
+                continue
+            for appearance in appearances.values():
+                # Each appearance is a stream or a dictionary of state streams
+                states = appearance.values() if isinstance(appearance, pikepdf.Dictionary) else [appearance]
+                for stream in states:
+                    if isinstance(stream, pikepdf.Stream):
+                        walk_form(stream, None, None)
+    
+    # Form fields draw with the AcroForm default resources
+    acroform = pdf.Root.get('/AcroForm')
+    if isinstance(acroform, pikepdf.Dictionary) and isinstance(acroform.get('/DR'), pikepdf.Dictionary):
+        keep_resources(acroform.DR, acroform)
+    
+    # Anything else holding resources might share a dictionary we walked
+    for obj in pdf.objects:
+        if isinstance(obj, (pikepdf.Dictionary, pikepdf.Stream)) and obj.objgen not in walked_holders and \
+                isinstance(obj.get('/Resources'), pikepdf.Dictionary):
+            keep_resources(obj.Resources, obj)
+    
+    resources_removed = 0
+    for key, category_dict in category_dicts.items():
+        if key in keep_all:
+            continue
+        for name in list(category_dict.keys()):
+            if name not in used_names[key]:
+                del category_dict[name]
+                resources_removed += 1
+    
+    print(f"DEBUG: Removed {resources_removed} unused resources after parsing {len(walked)} content streams", file=sys.stderr)
+    return {
+        "resources_removed": resources_removed,
+        "content_streams_parsed": len(walked)
+    }
+
+
+# zlib level for the lossless stream stage and for streams qpdf compresses on save
+DEFAULT_FLATE_LEVEL = 9
+# Rebuilt by qpdf on save, so recompressing them would be wasted work
+REGENERATED_STREAM_TYPES = ('/ObjStm', '/XRef')
+
+
+def redeflate(raw, level):
+    """Inflate and deflate again at level (pool thread; plain bytes only)"""
+    return zlib.compress(zlib.decompress(raw), level)
+
+
+def recompress_flate_streams(pdf, level, workers=0):
+    """
+    Losslessly recompress every non-image Flate stream (content streams,
+    fonts, ICC profiles, forms) at zlib level.
+    
+    Raw bytes are read on the calling thread and inflated/deflated on a
+    thread pool, since zlib releases the GIL. The new bytes replace a
+    stream only when they are smaller; any /DecodeParms predictor still
+    applies because the inflated data is re-deflated unchanged.
+    
+    Returns a dict with examined and recompressed stream counts and bytes saved.
+    """
+    print(f"DEBUG: Recompressing Flate streams at level {level}", file=sys.stderr)
+    streams_examined = 0
+    streams_recompressed = 0
+    bytes_saved = 0
+    
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    
+    def write_back(stream, raw_length, future):
+        try:
+            data = future.result()
+        except zlib.error as e:
+            print(f"DEBUG: Could not inflate stream {stream.objgen}: {str(e)}", file=sys.stderr)
+            return 0
+        if len(data) >= raw_length:
+            return 0
+        stream.write(data, filter=pikepdf.Name('/FlateDecode'), decode_parms=stream.get('/DecodeParms'))
+        return raw_length - len(data)
+    
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for obj in pdf.objects:
+            if not isinstance(obj, pikepdf.Stream):
+                continue
+            if obj.get('/Subtype') == '/Image' or obj.get('/Type') in REGENERATED_STREAM_TYPES:
+                continue
+            if stream_filters(obj) != ['/FlateDecode']:
+                continue
+            
+            while len(pending) >= workers * 4:
+                saved = write_back(*pending.popleft())
+                streams_recompressed += saved > 0
+                bytes_saved += saved
+            
+            raw = obj.read_raw_bytes()
+            streams_examined += 1
+            pending.append((obj, len(raw), pool.submit(redeflate, raw, level)))
+            del raw
+        
+        while pending:
+            saved = write_back(*pending.popleft())
+            streams_recompressed += saved > 0
+            bytes_saved += saved
+    
+    print(f"DEBUG: Recompressed {streams_recompressed} of {streams_examined} Flate streams, {bytes_saved} bytes saved", file=sys.stderr)
+    return {
+        "streams_examined": streams_examined,
+        "streams_recompressed": streams_recompressed,
+        "bytes_saved": bytes_saved
+    }
 
 
 def compress_pdf(input_path: str, output_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compress a PDF file, reusing a cached result for the same input and options.
+    """
+    cache_options = {k: v for k, v in options.items() if k not in NON_OUTPUT_OPTIONS}
+    result, cache_stats = RESULT_CACHE.run(
+        [input_path], cache_options, output_path,
+        lambda: compress_pdf_uncached(input_path, output_path, options),
+        lambda r: r.get('Success')
+    )
+    
+    if cache_stats and cache_stats['hit']:
+        result['OutputPath'] = str(Path(output_path))
+    result['Cache'] = cache_stats
+    return result
+
+
+def compress_pdf_uncached(input_path: str, output_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
     """
     Compress a PDF file with NUCLEAR options.
     """
@@ -195,15 +1124,34 @@ def compress_pdf(input_path: str, output_path: str, options: Dict[str, Any]) ->
         quality = options.get('quality', 75)
         remove_metadata = options.get('remove_metadata', False)
         remove_unused = options.get('remove_unused_objects', True)
+        image_workers = options.get('image_workers', 0)
+        memory_limit_mb = options.get('memory_limit_mb', 0)
+        target_size_mb = options.get('target_size_mb') or 0
+        target_dpi = options.get('target_dpi') or 0
+        min_image_saving = options.get('min_image_saving_percent', DEFAULT_MIN_IMAGE_SAVING_PERCENT)
+        flate_level = options.get('flate_level', DEFAULT_FLATE_LEVEL)
         
         print(f"DEBUG: NUCLEAR SETTINGS - Quality: {quality}, Remove Metadata: {remove_metadata}, Remove Unused: {remove_unused}", file=sys.stderr)
         
         # Validate quality
         if not 1 <= quality <= 100:
             raise ValueError("Quality must be between 1 and 100")
+        if not 0 <= flate_level <= 9:
+            raise ValueError("Flate level must be between 0 (off) and 9")
+        
+        reset_peak_rss()
+        
+        # Memory-budgeted mode: map the file instead of reading it, and give
+        # half of the budget to decoded images in flight
+        if memory_limit_mb > 0:
+            access_mode = pikepdf.AccessMode.mmap
+            image_memory_budget = memory_limit_mb * 1024 * 1024 // 2
+        else:
+            access_mode = pikepdf.AccessMode.default
+            image_memory_budget = 0
         
         # Open PDF with pikepdf
-        with pikepdf.open(input_path) as pdf:
+        with pikepdf.open(input_path, access_mode=access_mode) as pdf:
             
             # Remove metadata if requested
             if remove_metadata:
@@ -214,12 +1162,34 @@ def compress_pdf(input_path: str, output_path: str, options: Dict[str, Any]) ->
                 if '/Info' in pdf.trailer:
                     del pdf.trailer['/Info']
             
-            # NUCLEAR COMPRESSION - Always compress images aggressively
+            # Prune unused resources first so orphaned images are never recompressed
+            if remove_unused:
+                unused_stats = remove_unused_resources(pdf)
+            else:
+                unused_stats = {"resources_removed": 0, "content_streams_parsed": 0}
+            
+            # Merge duplicate images first so each copy is only recompressed once
+            duplicate_stats = remove_duplicate_images(pdf)
+            
+            # Target-size mode: search the image settings on samples, then run the full pass once
+            target_settings = None
+            if target_size_mb > 0:
+                target_settings = choose_target_settings(pdf, int(target_size_mb * 1024 * 1024), original_size)
+                print(f"DEBUG: Target size settings: {target_settings}", file=sys.stderr)
+            settings = (target_settings['max_dimension'], target_settings['jpeg_quality']) if target_settings else None
+            
+            # NUCLEAR COMPRESSION - Always compress images aggressively. Target-size
+            # settings were measured with every image re-encoded, so nothing is pre-skipped.
             print(f"DEBUG: ACTIVATING NUCLEAR COMPRESSION with quality {quality}", file=sys.stderr)
-            images_compressed = compress_images_nuclear(pdf, quality)
+            image_stats = compress_images_nuclear(pdf, quality, image_workers, image_memory_budget, settings,
+                                                  0 if target_settings else target_dpi,
+                                                  None if target_settings else min_image_saving)
             
-            # Remove duplicate images for extra savings
-            duplicates_removed = remove_duplicate_images(pdf)
+            # Lossless stage, independent of quality: re-deflate fonts, content streams etc.
+            if flate_level > 0:
+                stream_stats = recompress_flate_streams(pdf, flate_level, image_workers)
+            else:
+                stream_stats = {"streams_examined": 0, "streams_recompressed": 0, "bytes_saved": 0}
             
             # ULTRA-AGGRESSIVE PDF compression settings
             print("DEBUG: Using ULTRA-AGGRESSIVE PDF compression", file=sys.stderr)
@@ -227,17 +1197,22 @@ def compress_pdf(input_path: str, output_path: str, options: Dict[str, Any]) ->
             # FIXED: Use only valid pikepdf save parameters that work cross-platform
             save_settings = {
                 'compress_streams': True,
-                'stream_decode_level': pikepdf.StreamDecodeLevel.all,
+                # generalized re-packs Flate/LZW/ASCII streams but leaves JPEG, JPX,
+                # JBIG2 and CCITT image data alone; "all" turned every JPEG into Flate
+                'stream_decode_level': pikepdf.StreamDecodeLevel.generalized,
                 'object_stream_mode': pikepdf.ObjectStreamMode.generate,
-                'normalize_content': True,
+                # qpdf writes normalized content streams uncompressed
+                'normalize_content': False,
                 'linearize': False,
                 # Remove problematic parameters:
-                # 'stream_compression_level': 9,  # NOT SUPPORTED - causes the error
                 # 'min_version': pdf.pdf_version,  # Can cause compatibility issues
-                # 'recompress_flate': True,  # Not a valid parameter
                 # 'preserve_pdfa': False,  # Not needed for basic compression
             }
             
+            # Streams qpdf compresses itself (uncompressed or LZW ones) use the
+            # same level; existing Flate data is written as is. -1 is zlib's default.
+            pikepdf.settings.set_flate_compression_level(flate_level or -1)
+            
             # Try to save with aggressive compression
             try:
                 pdf.save(output_file, **save_settings)
@@ -256,7 +1231,7 @@ def compress_pdf(input_path: str, output_path: str, options: Dict[str, Any]) ->
             compression_ratio = 0
         
         print(f"DEBUG: NUCLEAR RESULT - Original: {original_size}, Compressed: {compressed_size}, Ratio: {compression_ratio:.2f}%", file=sys.stderr)
-        print(f"DEBUG: Images compressed: {images_compressed}, Duplicates removed: {duplicates_removed}", file=sys.stderr)
+        print(f"DEBUG: Images compressed: {image_stats['images_processed']}, Duplicates merged: {duplicate_stats['duplicates_merged']}", file=sys.stderr)
         
         # If compression made file larger, use original instead
         if compressed_size >= original_size:
@@ -266,15 +1241,42 @@ def compress_pdf(input_path: str, output_path: str, options: Dict[str, Any]) ->
             compression_ratio = 0
         
         # Return success result
-        return {
+        result = {
             "Success": True,
             "OriginalSize": original_size,
             "CompressedSize": compressed_size,
             "CompressionRatio": round(compression_ratio, 2),
             "OutputPath": str(output_file),
+            "ImagesCompressed": image_stats['images_processed'],
+            "ImagesKeptOriginal": image_stats['images_kept_original'],
+            "ImageBytesSaved": image_stats['image_bytes_saved'],
+            "UniqueImages": image_stats['unique_images'],
+            "ImageReferences": image_stats['image_references'],
+            "ImagesSkippedAtTargetDpi": image_stats['images_skipped_dpi'],
+            "ImagesSkippedByAnalysis": image_stats['images_skipped_analysis'],
+            "ImageDecisions": image_stats['decisions'],
+            "DuplicateImagesMerged": duplicate_stats['duplicates_merged'],
+            "DuplicateBytesSaved": duplicate_stats['bytes_saved'],
+            "UnusedResourcesRemoved": unused_stats['resources_removed'],
+            "StreamsRecompressed": stream_stats['streams_recompressed'],
+            "StreamBytesSaved": stream_stats['bytes_saved'],
+            "PeakRssMb": peak_rss_mb(),
             "Error": None
         }
         
+        if target_size_mb > 0:
+            target_bytes = int(target_size_mb * 1024 * 1024)
+            result.update({
+                "TargetSizeBytes": target_bytes,
+                "TargetMet": compressed_size <= target_bytes,
+                "ChosenMaxDimension": settings[0] if settings else None,
+                "ChosenJpegQuality": settings[1] if settings else None,
+                "EstimatedSize": target_settings['estimated_size'] if target_settings else None,
+                "TargetEvaluations": target_settings['evaluations'] if target_settings else 0
+            })
+        
+        return result
+        
     except Exception as e:
         print(f"DEBUG: NUCLEAR FAILURE: {str(e)}", file=sys.stderr)
         return {
@@ -287,6 +1289,18 @@ def compress_pdf(input_path: str, output_path: str, options: Dict[str, Any]) ->
         }
 
 
+def run_job(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one compression job from a worker request."""
+    return compress_pdf(params.get('input'), params.get('output'), params.get('options') or {})
+
+
+def run_batch_item(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one batch job; the batch already keeps every core busy, so default to one image thread."""
+    options = dict(params.get('options') or {})
+    options.setdefault('image_workers', 1)
+    return compress_pdf(params.get('input'), params.get('output'), options)
+
+
 def main():
     """Main entry point for command-line usage."""
     parser = argparse.ArgumentParser(
@@ -294,24 +1308,63 @@ def main():
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
     
-    parser.add_argument('input', help='Input PDF file path')
-    parser.add_argument('output', help='Output PDF file path')
+    parser.add_argument('input', nargs='?', help='Input PDF file path')
+    parser.add_argument('output', nargs='?', help='Output PDF file path')
     parser.add_argument('--quality', type=int, default=1,
                        help='Compression quality (1-100, default: 1 - MAXIMUM COMPRESSION)')
     parser.add_argument('--remove-metadata', action='store_true', default=True,
                        help='Remove PDF metadata (default: True)')
     parser.add_argument('--remove-unused', action='store_true', default=True,
                        help='Remove unused objects (default: True)')
+    parser.add_argument('--image-workers', type=int, default=0,
+                       help='Threads for image and stream recompression (default: 0 - one per CPU core)')
+    parser.add_argument('--target-size-mb', type=float, default=0,
+                       help='Aim for an output under this size; image settings are searched on samples (overrides --quality)')
+    parser.add_argument('--target-dpi', type=int, default=0,
+                       help='Downsample images drawn above this DPI, leave the rest alone (default: 0 - size by quality; ignored with --target-size-mb)')
+    parser.add_argument('--min-image-saving-percent', type=int, default=DEFAULT_MIN_IMAGE_SAVING_PERCENT,
+                       help=f'Recompress a JPEG image only if its predicted saving is at least this percent (default: {DEFAULT_MIN_IMAGE_SAVING_PERCENT})')
+    parser.add_argument('--flate-level', type=int, default=DEFAULT_FLATE_LEVEL,
+                       help=f'zlib level for lossless recompression of fonts and content streams, 0 = off (default: {DEFAULT_FLATE_LEVEL})')
+    parser.add_argument('--memory-limit-mb', type=int, default=0,
+                       help='Memory budget in MB: mmap the input and cap decoded images in flight (default: 0 - no budget)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Do not read or write the result cache')
     parser.add_argument('--json', action='store_true',
                        help='Output results as JSON')
+    parser.add_argument('--worker', action='store_true',
+                       help='Run as a long-lived worker reading JSON jobs from stdin')
+    parser.add_argument('--batch', metavar='MANIFEST',
+                       help='Run every job in a JSON manifest, streaming one JSON result line per job')
+    parser.add_argument('--batch-workers', type=int,
+                       help='Processes for --batch (default: from the manifest, else one per CPU core)')
     
     args = parser.parse_args()
     
+    if args.no_cache:
+        RESULT_CACHE.enabled = False
+    
+    if args.worker:
+        run_worker(run_job, 'compress_pdf')
+        return
+    
+    if args.batch:
+        sys.exit(0 if run_batch(args.batch, run_batch_item, args.batch_workers) else 1)
+    
+    if not args.input or not args.output:
+        parser.error('input and output are required')
+    
     # Build options dict
     options = {
         'quality': args.quality,
         'remove_metadata': args.remove_metadata,
-        'remove_unused_objects': args.remove_unused
+        'remove_unused_objects': args.remove_unused,
+        'image_workers': args.image_workers,
+        'memory_limit_mb': args.memory_limit_mb,
+        'target_size_mb': args.target_size_mb,
+        'target_dpi': args.target_dpi,
+        'min_image_saving_percent': args.min_image_saving_percent,
+        'flate_level': args.flate_level
     }
     
     # Compress the PDF
@@ -335,4 +1388,6 @@ def main():
 
 
 if __name__ == '__main__':
+    # Required for process pools inside the frozen PyInstaller executable
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,134 @@
+##
+ # LocalPDF Studio - Offline PDF Toolkit
+ # ======================================
+ #
+ # @author      Md. Alinur Hossain <alinur1160@gmail.com>
+ # @version     0.0.2
+ # @license     MPL-2.0 (Mozilla Public License 2.0)
+ # @website     https://alinur1.github.io/LocalPDF_Studio_Website/
+ # @repository  https://github.com/Alinur1/LocalPDF_Studio
+ #
+ # Copyright (c) 2025 Md. Alinur Hossain. All rights reserved.
+ #
+ # This Source Code Form is subject to the terms of the Mozilla Public
+ # License, v. 2.0. If a copy of the MPL was not distributed with this
+ # file, You can obtain one at https://mozilla.org/MPL/2.0/.
+ #
+ # Architecture:
+ # - Frontend: Electron + HTML/CSS/JS
+ # - Backend: ASP.NET Core Web API, Python
+ # - PDF Engine: PdfSharp + Mozilla PDF.js
+##
+
+# Compares page encoders used by convert_pdf_images: pages/sec, output size
+# and peak RSS, at 150 and 300 DPI over the assets/Test PDFs corpus.
+#
+#   python benchmark_encoders.py [--corpus DIR] [--format jpg|png]
+#
+# Every (encoder, dpi) pair runs in a fresh child process so peak RSS is
+# measured per configuration. Peak RSS needs the Unix resource module and
+# is reported as null on Windows.
+
+
+import argparse
+import glob
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+from convert_pdf_images import encode_pixmap
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "assets", "Test PDFs")
+ENCODERS = ["pil-copy", "pil", "native"]
+
+
+def encode_pil_copy(pix, fmt):
+    """The original path: copy pix.samples into a new PIL image, then encode"""
+    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    buffer = io.BytesIO()
+    if fmt in ["jpg", "jpeg"]:
+        img.save(buffer, "JPEG", quality=95)
+    else:
+        img.save(buffer, "PNG", compress_level=6)
+    return buffer.getvalue()
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_child(corpus, encoder, dpi, fmt):
+    pages = 0
+    output_bytes = 0
+    zoom = dpi / 72.0
+    start = time.perf_counter()
+
+    for pdf_path in sorted(glob.glob(os.path.join(corpus, "*.pdf"))):
+        with fitz.open(pdf_path) as doc:
+            for page in doc:
+                pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+                if encoder == "pil-copy":
+                    data = encode_pil_copy(pix, fmt)
+                else:
+                    data = encode_pixmap(pix, fmt, encoder)
+                output_bytes += len(data)
+                pages += 1
+                pix = None
+
+    elapsed = time.perf_counter() - start
+    return {
+        "encoder": encoder,
+        "dpi": dpi,
+        "format": fmt,
+        "pages": pages,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(pages / elapsed, 2) if elapsed > 0 else None,
+        "output_bytes": output_bytes,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark convert_pdf_images page encoders")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Folder of PDFs to render")
+    parser.add_argument("--format", default="jpg", choices=["jpg", "png"], help="Image format")
+    parser.add_argument("--child", nargs=2, metavar=("ENCODER", "DPI"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        encoder, dpi = args.child
+        print(json.dumps(run_child(args.corpus, encoder, int(dpi), args.format)))
+        return
+
+    results = []
+    for dpi in [150, 300]:
+        for encoder in ENCODERS:
+            completed = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--corpus", args.corpus,
+                 "--format", args.format, "--child", encoder, str(dpi)],
+                capture_output=True, text=True, check=True
+            )
+            # The last stdout line is the result; fitz may print warnings first
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            results.append(result)
+            print(f"{dpi:>4} DPI  {encoder:<9} {result['pages_per_sec']:>8} pages/s  "
+                  f"{result['output_bytes'] / 1024 / 1024:>8.1f} MB out  "
+                  f"peak RSS {result['peak_rss_mb']} MB", file=sys.stderr)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
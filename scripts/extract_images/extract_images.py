@@ -28,8 +28,43 @@ import os
 from PIL import Image
 import io
 import base64
+import zipfile
+import multiprocessing
 
-def extract_images_from_pdf(pdf_path, pages=None, page_ranges=None, mode="extract"):
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from tool_worker import run_worker
+from result_cache import ResultCache
+from batch_runner import run_batch
+
+RESULT_CACHE = ResultCache("extract_images")
+
+IMAGE_FORMATS = ["original", "png", "jpg"]
+
+# File extensions for the stream types doc.extract_image() passes through
+PASSTHROUGH_EXTENSIONS = {"jpeg": "jpg", "jb2": "jbig2"}
+
+def extract_images_from_pdf(pdf_path, pages=None, page_ranges=None, mode="extract", output_path=None,
+                            image_format="original"):
+    """Extract or remove images, reusing a cached result for the same input and options"""
+    options = {
+        "pages": pages,
+        "page_ranges": page_ranges,
+        "mode": mode,
+        "image_format": image_format,
+        "output": "file" if output_path else "inline"
+    }
+    result, cache_stats = RESULT_CACHE.run(
+        [pdf_path], options, output_path,
+        lambda: extract_images_from_pdf_uncached(pdf_path, pages, page_ranges, mode, output_path, image_format),
+        lambda r: r.get("success")
+    )
+    if cache_stats and cache_stats["hit"] and output_path:
+        result["output"] = output_path
+    result["cache"] = cache_stats
+    return result
+
+def extract_images_from_pdf_uncached(pdf_path, pages=None, page_ranges=None, mode="extract", output_path=None,
+                                     image_format="original"):
     """
     Extract or analyze images from PDF pages
     
@@ -38,11 +73,18 @@ def extract_images_from_pdf(pdf_path, pages=None, page_ranges=None, mode="extrac
         pages: List of specific page numbers (1-based)
         page_ranges: List of page ranges like ["1-3", "5-7"]
         mode: "extract" or "remove"
+        output_path: Optional file to write to instead of returning base64 data;
+                     a ZIP of images in extract mode, the rewritten PDF in remove mode
+        image_format: "original" to keep each image's embedded encoding,
+                      or "png"/"jpg" to convert every image to that format
     
     Returns:
         Dictionary with results
     """
     try:
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unsupported image format: {image_format}")
+        
         doc = fitz.open(pdf_path)
         total_pages = doc.page_count
         
@@ -84,9 +126,9 @@ def extract_images_from_pdf(pdf_path, pages=None, page_ranges=None, mode="extrac
         pages_to_process = sorted(pages_to_process)
         
         if mode == "extract":
-            return extract_images(doc, pages_to_process)
+            return extract_images(doc, pages_to_process, output_path, image_format)
         else:  # remove mode
-            return remove_images(doc, pages_to_process, pdf_path)
+            return remove_images(doc, pages_to_process, pdf_path, output_path)
             
     except Exception as e:
         return {
@@ -99,50 +141,112 @@ def extract_images_from_pdf(pdf_path, pages=None, page_ranges=None, mode="extrac
         if 'doc' in locals():
             doc.close()
 
-def extract_images(doc, pages_to_process):
-    """Extract images from specified pages"""
+def image_entry_name(page_number, index, fmt):
+    """ZIP entry name for an extracted image"""
+    return f"page_{page_number}_image_{index:04d}.{fmt}"
+
+def passthrough_image(doc, xref):
+    """
+    Return the image as stored in the PDF, without decoding it.
+    
+    JPEG, JPEG 2000 and JBIG2 streams are copied byte for byte; streams with
+    no standalone file format (Flate, CCITT, ...) are wrapped as PNG by PyMuPDF.
+    """
+    info = doc.extract_image(xref)
+    if not info or not info.get("image"):
+        raise ValueError(f"no image data for xref {xref}")
+    
+    return info["image"], PASSTHROUGH_EXTENSIONS.get(info["ext"], info["ext"]), info["width"], info["height"]
+
+def convert_image(doc, xref, smask, image_format):
+    """Decode the image and re-encode it as image_format ("png" or "jpg")"""
+    pix = fitz.Pixmap(doc, xref)
+    
+    # CMYK, Lab, ... cannot be written as PNG/JPEG directly
+    if pix.colorspace and pix.colorspace.n not in (1, 3):
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    
+    # Attach the soft mask so transparency survives in PNG output
+    if smask and image_format == "png" and not pix.alpha:
+        try:
+            pix = fitz.Pixmap(pix, fitz.Pixmap(doc, smask))
+        except Exception as e:
+            print(f"Warning: Could not apply soft mask of xref {xref}: {e}", file=sys.stderr)
+    
+    if image_format == "jpg":
+        if pix.alpha:
+            pix = fitz.Pixmap(pix, 0)  # JPEG has no alpha channel
+        img_data = pix.tobytes("jpg", jpg_quality=95)
+    else:
+        img_data = pix.tobytes("png")
+    
+    return img_data, image_format, pix.width, pix.height
+
+def extract_images(doc, pages_to_process, output_path=None, image_format="original"):
+    """
+    Extract images from specified pages.
+    
+    image_format "original" emits each image's stored stream unchanged;
+    "png" or "jpg" decodes every image and converts it to that format.
+    
+    With output_path the images are streamed into a ZIP there and the result
+    only carries metadata, so memory stays flat however many images there are.
+    Without it every image is returned base64-encoded in the result.
+    """
     all_images = []
     total_images = 0
+    zipf = zipfile.ZipFile(output_path, "w", zipfile.ZIP_STORED) if output_path else None
     
-    for page_index in pages_to_process:
-        page = doc[page_index]
-        image_list = page.get_images()
-        
-        for img_index, img in enumerate(image_list):
-            try:
-                xref = img[0]
-                pix = fitz.Pixmap(doc, xref)
-                
-                # Convert to RGB if needed
-                if pix.n - pix.alpha < 4:  # can be saved as PNG
-                    img_data = pix.tobytes("png")
+    try:
+        for page_index in pages_to_process:
+            page = doc[page_index]
+            image_list = page.get_images()
+            
+            for img_index, img in enumerate(image_list):
+                try:
+                    xref = img[0]
+                    
+                    if image_format == "original":
+                        img_data, fmt, width, height = passthrough_image(doc, xref)
+                    else:
+                        img_data, fmt, width, height = convert_image(doc, xref, img[1], image_format)
                     
                     image_info = {
                         "page": page_index + 1,
                         "index": img_index,
-                        "width": pix.width,
-                        "height": pix.height,
-                        "format": "png",
-                        "data": base64.b64encode(img_data).decode('ascii')
+                        "width": width,
+                        "height": height,
+                        "format": fmt
                     }
+                    
+                    if zipf:
+                        image_info["name"] = image_entry_name(page_index + 1, img_index, fmt)
+                        zipf.writestr(image_info["name"], img_data)
+                    else:
+                        image_info["data"] = base64.b64encode(img_data).decode('ascii')
+                    
                     all_images.append(image_info)
                     total_images += 1
-                
-                pix = None  # Free pixmap memory
-                
-            except Exception as e:
-                print(f"Warning: Failed to extract image {img_index} from page {page_index + 1}: {e}", file=sys.stderr)
-                continue
+                    
+                except Exception as e:
+                    print(f"Warning: Failed to extract image {img_index} from page {page_index + 1}: {e}", file=sys.stderr)
+                    continue
+    finally:
+        if zipf:
+            zipf.close()
     
-    return {
+    result = {
         "success": True,
         "extracted_count": total_images,
         "processed_pages": len(pages_to_process),
         "images": all_images
     }
+    if output_path:
+        result["output"] = output_path
+    return result
 
-def remove_images(doc, pages_to_process, original_path):
-    """Remove images from specified pages and return modified PDF"""
+def remove_images(doc, pages_to_process, original_path, output_path=None):
+    """Remove images from specified pages and return (or write to output_path) the modified PDF"""
     try:
         # Create a new document
         new_doc = fitz.open()
@@ -168,8 +272,17 @@ def remove_images(doc, pages_to_process, original_path):
                         print(f"Warning: Could not remove image xref {xref} from page {page_index + 1}: {e}", file=sys.stderr)
                         continue
         
+        if output_path:
+            new_doc.save(output_path)
+            new_doc.close()
+            return {
+                "success": True,
+                "processed_pages": len(pages_to_process),
+                "output": output_path,
+                "removed_images_count": images_removed_count
+            }
+        
         # Save to a bytes buffer
-        import io
         pdf_buffer = io.BytesIO()
         new_doc.save(pdf_buffer)
         pdf_data = pdf_buffer.getvalue()
@@ -199,12 +312,42 @@ def remove_images(doc, pages_to_process, original_path):
             "processed_pages": 0
         }
 
+def run_job(request):
+    """Run one request from a worker; takes the same fields as the JSON request file"""
+    pdf_path = request.get("file_path")
+    if not pdf_path or not os.path.exists(pdf_path):
+        return {"success": False, "error": f"PDF file not found: {pdf_path}"}
+    
+    return extract_images_from_pdf(
+        pdf_path,
+        request.get("pages"),
+        request.get("page_ranges"),
+        request.get("mode", "extract"),
+        request.get("output_path"),
+        request.get("image_format", "original")
+    )
+
 def main():
+    if "--no-cache" in sys.argv[1:]:
+        RESULT_CACHE.enabled = False
+        sys.argv.remove("--no-cache")
+    
     if len(sys.argv) < 2:
         error_result = {"success": False, "error": "No arguments provided"}
         print(json.dumps(error_result))
         sys.exit(1)
     
+    if sys.argv[1] == "--worker":
+        run_worker(run_job, "extract_images")
+        return
+    
+    # extract_images.py --batch manifest.json: one JSON result line per job
+    if sys.argv[1] == "--batch":
+        if len(sys.argv) < 3:
+            print(json.dumps({"success": False, "error": "No batch manifest provided"}))
+            sys.exit(1)
+        sys.exit(0 if run_batch(sys.argv[2], run_job) else 1)
+    
     try:
         # Read JSON from file (first argument is file path)
         json_file_path = sys.argv[1]
@@ -216,13 +359,15 @@ def main():
         pages = request.get("pages")
         page_ranges = request.get("page_ranges")
         mode = request.get("mode", "extract")
+        output_path = request.get("output_path")
+        image_format = request.get("image_format", "original")
         
         if not pdf_path or not os.path.exists(pdf_path):
             error_result = {"success": False, "error": f"PDF file not found: {pdf_path}"}
             print(json.dumps(error_result))
             sys.exit(1)
         
-        result = extract_images_from_pdf(pdf_path, pages, page_ranges, mode)
+        result = extract_images_from_pdf(pdf_path, pages, page_ranges, mode, output_path, image_format)
         print(json.dumps(result))
         
     except json.JSONDecodeError as e:
@@ -235,4 +380,6 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # Required for process pools inside the frozen PyInstaller executable
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
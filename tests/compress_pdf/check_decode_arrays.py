@@ -0,0 +1,158 @@
+##
+ # LocalPDF Studio - Offline PDF Toolkit
+ # ======================================
+ #
+ # @author      Md. Alinur Hossain <alinur1160@gmail.com>
+ # @version     0.0.2
+ # @license     MPL-2.0 (Mozilla Public License 2.0)
+ # @website     https://alinur1.github.io/LocalPDF_Studio_Website/
+ # @repository  https://github.com/Alinur1/LocalPDF_Studio
+ #
+ # Copyright (c) 2025 Md. Alinur Hossain. All rights reserved.
+ #
+ # This Source Code Form is subject to the terms of the Mozilla Public
+ # License, v. 2.0. If a copy of the MPL was not distributed with this
+ # file, You can obtain one at https://mozilla.org/MPL/2.0/.
+ #
+ # Architecture:
+ # - Frontend: Electron + HTML/CSS/JS
+ # - Backend: ASP.NET Core Web API, Python
+ # - PDF Engine: PdfSharp + Mozilla PDF.js
+##
+
+# Checks that compress_pdf keeps images with a /Decode array looking the
+# same: builds a PDF with one such image per page (Flate and JPEG, RGB,
+# gray and CMYK, photo and flat colour), compresses it, renders both with
+# PyMuPDF and compares them page by page.
+#
+#   python tests/compress_pdf/check_decode_arrays.py [--quality N] [--keep DIR]
+#
+# Exits with status 1 when any page differs by more than its allowance. A
+# wrong /Decode shows up as a mean difference of 60 or more. Qualities at
+# or below 10 shrink the photos enough to fail on plain JPEG loss.
+
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import zlib
+
+import fitz  # PyMuPDF
+import numpy as np
+import pikepdf
+from PIL import Image
+
+# compress_pdf is a standalone script, not a package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "scripts", "compress_pdf"))
+
+from compress_pdf import compress_pdf_uncached  # noqa: E402
+
+PAGE_SIZE = 400
+RENDER_DPI = 30
+
+
+def flat_image(mode):
+    """A flat-colour chart, classed as palette (or bilevel/gray for L)"""
+    width, height = 1600, 1200
+    pixels = np.zeros((height, width, 3), dtype=np.uint8)
+    colors = [(200, 30, 30), (20, 160, 60), (30, 60, 120), (240, 240, 245)]
+    for i, color in enumerate(colors):
+        pixels[:, i * width // 4:(i + 1) * width // 4] = color
+    return Image.fromarray(pixels).convert(mode)
+
+
+def photo_image(mode):
+    """Smooth noise, classed as photo (or gray for L)"""
+    rng = np.random.default_rng(1)
+    small = Image.fromarray((rng.random((60, 80, 3)) * 255).astype(np.uint8))
+    return small.resize((1600, 1200), Image.Resampling.BICUBIC).convert(mode)
+
+
+# Pillow's CMYK to RGB conversion is naive next to MuPDF's colour
+# management, which alone costs about 20 on saturated CMYK pages
+CMYK_ALLOWANCE = 25
+
+CASES = [
+    # (label, image factory, mode, filter, /Decode, extra allowed mean difference)
+    ("rgb flat flate, default decode", flat_image, "RGB", "flate", [0, 1, 0, 1, 0, 1], 0),
+    ("rgb flat flate, inverted", flat_image, "RGB", "flate", [1, 0, 1, 0, 1, 0], 0),
+    ("rgb photo jpeg, inverted", photo_image, "RGB", "jpeg", [1, 0, 1, 0, 1, 0], 0),
+    ("gray photo flate, inverted", photo_image, "L", "flate", [1, 0], 0),
+    ("gray photo jpeg, inverted", photo_image, "L", "jpeg", [1, 0], 0),
+    ("cmyk photo jpeg, adobe decode", photo_image, "CMYK", "jpeg", [1, 0, 1, 0, 1, 0, 1, 0], CMYK_ALLOWANCE),
+    ("cmyk photo jpeg, no decode", photo_image, "CMYK", "jpeg", None, CMYK_ALLOWANCE),
+]
+
+COLOR_SPACES = {"RGB": "/DeviceRGB", "L": "/DeviceGray", "CMYK": "/DeviceCMYK"}
+
+
+def build_pdf(path):
+    pdf = pikepdf.new()
+    for label, factory, mode, kind, decode, _ in CASES:
+        image = factory(mode)
+        if kind == "jpeg":
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=90)
+            stream = pikepdf.Stream(pdf, buffer.getvalue())
+            stream.Filter = pikepdf.Name.DCTDecode
+        else:
+            stream = pikepdf.Stream(pdf, zlib.compress(image.tobytes()))
+            stream.Filter = pikepdf.Name.FlateDecode
+        stream.Type = pikepdf.Name.XObject
+        stream.Subtype = pikepdf.Name.Image
+        stream.Width, stream.Height = image.size
+        stream.ColorSpace = pikepdf.Name(COLOR_SPACES[mode])
+        stream.BitsPerComponent = 8
+        if decode:
+            stream.Decode = pikepdf.Array(decode)
+
+        pdf.add_blank_page(page_size=(PAGE_SIZE, PAGE_SIZE))
+        page = pdf.pages[-1]
+        page.obj.Resources = pikepdf.Dictionary(XObject=pikepdf.Dictionary(Im0=pdf.make_indirect(stream)))
+        page.obj.Contents = pdf.make_stream(f"q {PAGE_SIZE} 0 0 {PAGE_SIZE} 0 0 cm /Im0 Do Q".encode())
+    pdf.save(path)
+
+
+def render(doc, index):
+    pix = doc[index].get_pixmap(dpi=RENDER_DPI, alpha=False)
+    return np.frombuffer(pix.samples, dtype=np.uint8).astype(np.int16)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check /Decode handling in compress_pdf")
+    parser.add_argument("--quality", type=int, default=50, help="Compression quality (1-100)")
+    parser.add_argument("--max-diff", type=float, default=8.0, help="Largest allowed mean pixel difference per page")
+    parser.add_argument("--keep", metavar="DIR", help="Keep the generated PDFs in this folder")
+    args = parser.parse_args()
+
+    work_dir = args.keep or tempfile.mkdtemp(prefix="check_decode_")
+    os.makedirs(work_dir, exist_ok=True)
+    source = os.path.join(work_dir, "decode_source.pdf")
+    output = os.path.join(work_dir, "decode_compressed.pdf")
+
+    build_pdf(source)
+    with contextlib.redirect_stderr(io.StringIO()):
+        result = compress_pdf_uncached(source, output, {"quality": args.quality, "min_image_saving_percent": -100})
+    if not result["Success"]:
+        print(f"Compression failed: {result['Error']}", file=sys.stderr)
+        sys.exit(1)
+
+    decisions = {d["object"]: d for d in result.get("ImageDecisions", [])}
+    failed = False
+    with fitz.open(source) as before, fitz.open(output) as after:
+        for index, (label, *_, allowance) in enumerate(CASES):
+            diff = float(np.abs(render(before, index) - render(after, index)).mean())
+            page_failed = diff > args.max_diff + allowance
+            failed |= page_failed
+            print(f"{'FAIL' if page_failed else 'ok':<4}  {label:<32} mean diff {diff:6.2f}")
+
+    print(f"{len(decisions)} images, classes: "
+          f"{sorted({d.get('image_class') or d.get('action') for d in decisions.values()})}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()